@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Generador LaTeX
+Mide la conversión Markdown→LaTeX (y opcionalmente la compilación) sobre
+datasheets sintéticos de 1× a 100× el tamaño de en/content.md
+"""
+
+import argparse
+import json
+import platform
+import re
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import generate_final
+from generate_final import LatexDocGenerator
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 5
+# Caída de MB/s (o subida de memoria) tolerada frente a la línea base
+DEFAULT_THRESHOLD = 0.20
+# Duración mínima de cada muestra: los casos rápidos se repiten hasta llegar
+DEFAULT_MIN_TIME = 0.2
+# Diferencias de tiempo por llamada por debajo de esto se consideran ruido (s)
+DEFAULT_NOISE_FLOOR = 0.001
+
+# Archivos que el documento generado carga con \includegraphics
+INCLUDEGRAPHICS_PATTERN = re.compile(r'\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}')
+
+def extra_section(index: int, images: List[str]) -> str:
+    """Bloque sintético con tabla larga, lista, imagen y caracteres especiales"""
+    rows = '\n'.join(
+        f"| P{index}.{row} | {row * 0.1:.1f} | ±{row}% | 25°C ≤ T ≤ 85°C | µA & mA_{row} | #{row} $x$ |"
+        for row in range(40)
+    )
+    image = images[index % len(images)] if images else 'resources/missing.png'
+    return f"""
+## Synthetic Block {index}
+
+**Table {index}: Synthetic Parameters {index}**
+
+| Parameter | Value | Tolerance | Range | Units | Notes |
+|-----------|-------|-----------|-------|-------|-------|
+{rows}
+
+- ✅ Item with **bold**, *italic* and `code_{index}` → 100% & more
+- ⚠️ Caracteres especiales: $ % & _ # {{ }} ~ ^ \\ ° ± µ Ω ≤ ≥
+- [Enlace {index}](https://example.com/{index}?a=1&b=2)
+
+1. Paso uno con 50% de carga
+2. Paso dos a 3.3V ± 5%
+
+![Synthetic figure {index}]({image})
+
+Texto con fórmula $V_{{out}} = {index} \\times R$ y precio $5 USD.
+"""
+
+def table_heavy_datasheet(scale: int) -> str:
+    """Datasheet solo de tablas: por copia, 20 tablas pequeñas con título y una de 500 filas"""
+    parts = []
+    for copy in range(1, scale + 1):
+        for index in range(1, 21):
+            parts.append(f"""**Table {copy}.{index}: Pin Group {index}**
+
+| Pin | Name | Type | Description |
+|-----|------|------|-------------|
+| {index} | GPIO_{index} | I/O | General purpose I/O, 3.3V ± 5% |
+| {index + 1} | VDD | Power | Supply, 25°C ≤ T ≤ 85°C |
+| {index + 2} | GND | Ground | **Ground** & shield |
+""")
+        rows = '\n'.join(
+            f"| R{copy}.{row} | {row * 0.1:.1f} | ±{row % 10}% | {row % 125}°C | µA & mA | "
+            f"{'**max**' if row % 10 == 0 else 'typ'} |"
+            for row in range(500)
+        )
+        parts.append(f"""**Table {copy}.21: Register Map {copy}**
+
+| Register | Value | Tolerance | Temperature | Units | Notes |
+|----------|-------|-----------|-------------|-------|-------|
+{rows}
+""")
+    return '\n'.join(parts)
+
+def synthetic_datasheet(base: str, scale: int) -> str:
+    """Datasheet de scale veces el contenido base, más un bloque extra por copia"""
+    images = sorted(set(generate_final.IMAGE_PATTERN.findall(base)), key=lambda m: m[1])
+    image_paths = [path for _, path in images]
+    parts = []
+    for copy in range(scale):
+        parts.append(base)
+        parts.append(extra_section(copy + 1, image_paths))
+    return '\n'.join(parts)
+
+def measure(func: Callable[[], object], repeat: int,
+            min_time: float = DEFAULT_MIN_TIME) -> Tuple[float, int]:
+    """Mejor tiempo por llamada de repeat muestras y pico de memoria (tracemalloc, aparte)
+    
+    Cada muestra ejecuta func las veces necesarias para durar al menos
+    min_time segundos, como timeit.Timer.autorange, de modo que los casos de
+    menos de un milisegundo no dependan de la resolución ni del ruido del reloj.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        # Estimar las llamadas que faltan para min_time (al menos el doble)
+        number = max(number * 2, int(number * min_time / elapsed * 1.1) if elapsed > 0 else 0)
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        best = min(best, timer.timeit(number) / number)
+    
+    # tracemalloc ralentiza la ejecución: el pico se mide en una pasada propia
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def run_benchmarks(generator: LatexDocGenerator, lang: str, scales: List[int],
+                   repeat: int, compile_pdf: bool = False,
+                   min_time: float = DEFAULT_MIN_TIME) -> Dict[str, Dict]:
+    """Ejecuta cada benchmark en cada escala; clave '<benchmark>@<escala>x'"""
+    base = (generator.base_dir / lang / "content.md").read_text(encoding='utf-8')
+    metadata = generator.load_metadata(lang)
+    template = generator.template_file.read_text(encoding='utf-8')
+    
+    results = {}
+    for scale in scales:
+        content = synthetic_datasheet(base, scale)
+        tables = table_heavy_datasheet(scale)
+        body = generator.process_markdown(content, lang)
+        context = dict(metadata, body=body)
+        document = generator.process_template(template, context)
+        
+        cases = {
+            'process_markdown': (lambda: generator.process_markdown(content, lang), content),
+            'process_tables': (lambda: generator.process_tables(content), content),
+            'escape_latex_chars': (lambda: generator.escape_latex_chars(content), content),
+            'process_template': (lambda: generator.process_template(template, context), document),
+            'tables_markdown': (lambda: generator.process_markdown(tables, lang), tables),
+            'tables_tables': (lambda: generator.process_tables(tables), tables),
+        }
+        if compile_pdf:
+            assets = {name: generator.docs_dir / name
+                      for name in set(INCLUDEGRAPHICS_PATTERN.findall(document))
+                      if (generator.docs_dir / name).is_file()}
+            cases['compile'] = (lambda: generate_final.compile_pdf_bytes(document, assets), document)
+        
+        for name, (func, data) in cases.items():
+            size = len(data.encode('utf-8'))
+            # La compilación es lenta: una sola medición
+            if name == 'compile':
+                seconds, peak = measure(func, 1, min_time=0)
+            else:
+                seconds, peak = measure(func, repeat, min_time=min_time)
+            key = f"{name}@{scale}x"
+            results[key] = {
+                'bytes': size,
+                'seconds': round(seconds, 6),
+                'mb_per_s': round(size / seconds / 1e6, 3) if seconds else None,
+                'peak_bytes': peak,
+            }
+            print(f"  {key:<28} {size / 1e6:8.2f} MB {seconds * 1000:10.1f} ms "
+                  f"{results[key]['mb_per_s'] or 0:8.2f} MB/s {peak / 1e6:8.1f} MB pico")
+    return results
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float,
+            noise_floor: float = DEFAULT_NOISE_FLOOR) -> List[str]:
+    """Regresiones frente a la línea base: menos MB/s o más memoria que el umbral
+    
+    Una caída de MB/s solo cuenta si además el tiempo por llamada crece más de
+    noise_floor segundos: en los casos de microsegundos el porcentaje es ruido.
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        slower = result['seconds'] - reference.get('seconds', 0)
+        if reference.get('mb_per_s') and result['mb_per_s'] is not None and slower > noise_floor:
+            if result['mb_per_s'] < reference['mb_per_s'] * (1 - threshold):
+                regressions.append(f"{key}: {result['mb_per_s']} MB/s "
+                                   f"(línea base {reference['mb_per_s']} MB/s)")
+        if reference.get('peak_bytes'):
+            if result['peak_bytes'] > reference['peak_bytes'] * (1 + threshold):
+                regressions.append(f"{key}: pico {result['peak_bytes']} bytes "
+                                   f"(línea base {reference['peak_bytes']} bytes)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del Generador LaTeX")
+    parser.add_argument('--dir', default='.', help='Directorio base')
+    parser.add_argument('--lang', default='en', help='Idioma cuyo content.md se escala')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help='Factores de escala del datasheet sintético')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Repeticiones por medición (se toma la mejor)')
+    parser.add_argument('--compile', action='store_true',
+                        help='Medir también la compilación con pdflatex')
+    parser.add_argument('--baseline', help='JSON de línea base con el que comparar')
+    parser.add_argument('--save-baseline', help='Guardar los resultados como línea base')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Regresión tolerada (0.2 = 20%%)')
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                        help='Segundos mínimos de cada muestra (los casos rápidos se repiten)')
+    parser.add_argument('--noise-floor', type=float, default=DEFAULT_NOISE_FLOOR,
+                        help='Diferencia por llamada (s) por debajo de la cual no hay regresión')
+    
+    args = parser.parse_args()
+    
+    generator = LatexDocGenerator(args.dir)
+    generator.prepare_output_dirs()
+    
+    print(f"⏱️  Benchmark de {args.lang}/content.md a escalas "
+          f"{', '.join(f'{scale}x' for scale in args.scales)}")
+    results = run_benchmarks(generator, args.lang, args.scales, max(1, args.repeat),
+                             compile_pdf=args.compile, min_time=max(0.0, args.min_time))
+    
+    if args.save_baseline:
+        baseline = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"💾 Línea base guardada en {args.save_baseline}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get('results', {}), args.threshold,
+                              noise_floor=args.noise_floor)
+        if regressions:
+            print(f"❌ {len(regressions)} regresión(es) por encima del {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"✅ Sin regresiones frente a {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -3,41 +3,1150 @@
 Generador LaTeX Final - Versión corregida y optimizada
 """
 
+from __future__ import annotations
+
+# Solo lo necesario para una compilación incremental sin cambios: los módulos
+# de los demás modos (pdflatex, pools, asyncio, --serve, --watch) y logging
+# se importan en las funciones que los usan
+import math
 import os
 import re
-import yaml
-import shutil
-import subprocess
-from datetime import datetime
-import argparse
+import time
+import threading
+import sys
+from contextlib import contextmanager, nullcontext
+import bisect
+import contextvars
 from pathlib import Path
-from typing import Dict, List
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from typing import AsyncContextManager, Dict, List, Optional, Tuple, Union
+
+from yaml_cache import YamlCache
+
+# Niveles de logging usados aquí (sin importarlo)
+INFO, WARNING, ERROR = 20, 30, 40
+
+class _LazyLogger:
+    """Logger "generate_final" que importa logging solo cuando hace falta
+    
+    logging es la importación más cara de una compilación sin cambios. Con
+    console_level fijado por main() y logging aún sin importar, los mensajes
+    se escriben directamente en stderr, igual que con basicConfig
+    ('%(message)s'). En cuanto logging está cargado (API, pruebas, pools,
+    asyncio) todo pasa por logging.getLogger("generate_final").
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.console_level: Optional[int] = None
+        self._logger = None
+    
+    def resolve(self):
+        """El logger de logging; en modo consola configura antes basicConfig"""
+        if self._logger is None:
+            import logging
+            if self.console_level is not None:
+                logging.basicConfig(level=self.console_level, format='%(message)s')
+            self._logger = logging.getLogger(self.name)
+        return self._logger
+    
+    def _log(self, level: int, msg: str, *args, **kwargs):
+        if (self._logger is None and self.console_level is not None
+                and 'logging' not in sys.modules):
+            if level >= self.console_level:
+                print(msg % args if args else msg, file=sys.stderr)
+            return
+        kwargs.setdefault('stacklevel', 3)
+        self.resolve().log(level, msg, *args, **kwargs)
+    
+    def info(self, msg: str, *args, **kwargs):
+        self._log(INFO, msg, *args, **kwargs)
+    
+    def warning(self, msg: str, *args, **kwargs):
+        self._log(WARNING, msg, *args, **kwargs)
+    
+    def error(self, msg: str, *args, **kwargs):
+        self._log(ERROR, msg, *args, **kwargs)
+
+# Los mensajes de estado van por logging; main() los muestra en consola
+logger = _LazyLogger("generate_final")
+
+def _import_validators():
+    """Importa validate_standards con el logging de consola ya configurado
+    
+    Al importarse llama a basicConfig con su propio formato; resolver antes el
+    logger mantiene el de main().
+    """
+    logger.resolve()
+    import validate_standards
+    return validate_standards
+
+# Template por defecto de la API en memoria (render)
+DEFAULT_TEMPLATE_FILE = Path(__file__).with_name("template.tex")
+# Estándares de --validate si el producto no tiene su document_standards.yaml
+DEFAULT_STANDARDS_FILE = Path(__file__).with_name("document_standards.yaml")
+
+IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+# Logos de images/ que se copian a docs/ (el primero que exista)
+ESSENTIAL_FILES = ('logo.png', 'logo.jpg', 'logo.jpeg')
+
+# Mensajes de pdflatex/paquetes que indican que hace falta otra pasada
+RERUN_PATTERN = re.compile(
+    r'Rerun to get|Label\(s\) may have changed|Please rerun LaTeX|'
+    r'Table widths have changed|Rerun LaTeX'
+)
+# Archivos auxiliares cuyo cambio entre pasadas obliga a recompilar
+AUX_EXTENSIONS = ('.aux', '.toc', '.lof', '.lot', '.out')
+DEFAULT_MAX_PASSES = 3
+
+# Marca de template.tex hasta la que el preámbulo es fijo y se precompila
+FORMAT_DUMP_MARKER = r'\csname endofdump\endcsname'
+TEMPLATE_VARIABLE_PATTERN = re.compile(r'\$(?:if\(|for\()?[a-zA-Z_][a-zA-Z0-9_.]*\)?\$')
+
+# Versión del formato de docs/.build-cache.json
+BUILD_MANIFEST_VERSION = 1
+# Serializa las escrituras del manifiesto entre hilos (modo --serve)
+_MANIFEST_LOCK = threading.Lock()
+
+# Caché compartida y resumen por defecto del modo --catalog
+DEFAULT_CATALOG_CACHE = ".build-cache"
+DEFAULT_CATALOG_SUMMARY = "catalog-summary.json"
+
+# Memoria que se reserva por proceso pdflatex al limitar la concurrencia
+TEX_PROCESS_MEMORY = 256 * 1024 * 1024
+
+def tex_concurrency_limit(memory_per_process: int = TEX_PROCESS_MEMORY) -> int:
+    """pdflatex simultáneos que admite la máquina: CPUs y memoria disponible"""
+    limit = os.cpu_count() or 1
+    available = None
+    try:
+        with open('/proc/meminfo', 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError):
+        pass
+    if available is None:
+        try:
+            available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (AttributeError, ValueError, OSError):
+            pass
+    if available:
+        limit = min(limit, available // memory_per_process)
+    return max(1, limit)
+
+# Identificador de la instalación de pdflatex, por ruta del ejecutable
+_PDFLATEX_BUILDS: Dict[str, str] = {}
+
+def pdflatex_build_id() -> str:
+    """Versión y ejecutable de pdflatex a los que queda ligado un formato volcado
+    
+    Un .fmt solo lo carga el pdflatex que lo creó: tras actualizar TeX Live el
+    identificador cambia y el formato se vuelve a volcar.
+    """
+    import shutil
+    import subprocess
+    executable = shutil.which('pdflatex')
+    if executable is None:
+        return ''
+    build_id = _PDFLATEX_BUILDS.get(executable)
+    if build_id is None:
+        try:
+            result = subprocess.run([executable, '--version'], capture_output=True,
+                                    text=True, errors='replace', timeout=30)
+            lines = result.stdout.splitlines() if result.returncode == 0 else []
+            version = lines[0] if lines else ''
+            mtime = os.stat(executable).st_mtime_ns
+        except (OSError, subprocess.SubprocessError):
+            version, mtime = '', 0
+        build_id = _PDFLATEX_BUILDS[executable] = f"{version}|{executable}|{mtime}"
+    return build_id
+
+def _file_sha256(path: Path) -> str:
+    """Hash SHA-256 del contenido de un archivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Ancho de las imágenes según palabras clave del nombre (fracción de \textwidth)
+IMAGE_WIDTH_RULES = [
+    (['pinout', 'pin_out', 'diagram'], 0.9),
+    (['dimension', 'size', 'physical'], 0.6),
+    (['schematic', 'circuit'], 1.0),
+    (['block', 'topology', 'top', 'btm'], 0.7),
+]
+DEFAULT_IMAGE_WIDTH = 0.8
+# \textwidth de template.tex: A4 (8.27in) con márgenes de 1in
+TEXTWIDTH_INCHES = 8.27 - 2 * 1.0
+DEFAULT_IMAGE_DPI = 300
+DEFAULT_JPEG_QUALITY = 85
+
+# ioctl de Linux para clonar un archivo (reflink) en btrfs/XFS
+FICLONE = 0x40049409
+
+def _writer_id() -> str:
+    """Sufijo único por proceso e hilo para archivos temporales"""
+    return f"{os.getpid()}-{threading.get_ident()}"
+
+def _write_atomic(path: Path, text: str):
+    """Escribe un archivo de texto a través de un temporal y os.replace"""
+    path = Path(path)
+    tmp_file = path.with_name(f".{path.name}.{_writer_id()}.tmp")
+    tmp_file.write_text(text, encoding='utf-8')
+    os.replace(tmp_file, path)
+
+def _link_or_copy(source: Path, dest: Path):
+    """Crea dest como hardlink de source; si no se puede, reflink o copia"""
+    try:
+        os.link(source, dest)
+        return
+    except OSError:
+        pass
+    
+    try:
+        import fcntl
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return
+    except (ImportError, OSError):
+        dest.unlink(missing_ok=True)
+    
+    import shutil
+    shutil.copy2(source, dest)
+
+class BuildReport:
+    """Tiempos por etapa, pasadas de pdflatex, bytes y aciertos de caché de un idioma
+    
+    Las etapas pueden anidarse (images.* ocurre dentro de markdown.emit); cada
+    una acumula su tiempo total y el número de veces que se ejecutó.
+    """
+    
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.passes: List[Dict] = []
+        self.bytes: Dict[str, int] = {}
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.diagnostics: List[Dict] = []
+    
+    def add_stage(self, name: str, seconds: float):
+        stage = self.stages.setdefault(name, {'seconds': 0.0, 'count': 0})
+        stage['seconds'] += seconds
+        stage['count'] += 1
+    
+    def add_bytes(self, name: str, size: int):
+        self.bytes[name] = self.bytes.get(name, 0) + size
+    
+    def cache_event(self, name: str, hit: bool):
+        counters = self.cache.setdefault(name, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+    
+    def as_dict(self) -> Dict:
+        cache = {}
+        for name, counters in sorted(self.cache.items()):
+            total = counters['hits'] + counters['misses']
+            cache[name] = dict(counters, hit_rate=round(counters['hits'] / total, 3) if total else None)
+        return {
+            'stages': {name: {'seconds': round(stage['seconds'], 6), 'count': stage['count']}
+                       for name, stage in self.stages.items()},
+            'pdflatex_passes': self.passes,
+            'bytes': dict(sorted(self.bytes.items())),
+            'cache': cache,
+            'diagnostics': self.diagnostics,
+        }
+
+# Informe activo del hilo o tarea asyncio actual (lo fija build_language);
+# fuera de una compilación las mediciones no hacen nada
+_ACTIVE_REPORT: contextvars.ContextVar[Optional[BuildReport]] = \
+    contextvars.ContextVar('active_report', default=None)
+
+def _current_report() -> Optional[BuildReport]:
+    return _ACTIVE_REPORT.get()
+
+@contextmanager
+def _reporting(report: BuildReport):
+    token = _ACTIVE_REPORT.set(report)
+    try:
+        yield report
+    finally:
+        _ACTIVE_REPORT.reset(token)
+
+@contextmanager
+def _stage(name: str):
+    """Mide una etapa en el informe activo"""
+    report = _current_report()
+    if report is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        report.add_stage(name, time.perf_counter() - start)
+
+def _cache_event(name: str, hit: bool):
+    report = _current_report()
+    if report is not None:
+        report.cache_event(name, hit)
+
+def _count_bytes(name: str, size: int):
+    report = _current_report()
+    if report is not None:
+        report.add_bytes(name, size)
+
+# Emojis y su texto equivalente en LaTeX
+EMOJI_REPLACEMENTS = {
+    '⚙️': 'Technical Specifications',
+    '🔌': 'Pinout',
+    '📏': 'Dimensions',
+    '📃': 'Topology',
+    '🚀': '',
+    '✅': '',
+    '❌': '',
+    '📊': '',
+    '🧪': '',
+    '📄': '',
+    '📚': '',
+    '🎯': '',
+    '⚡': '',
+    '🔧': '',
+    '📦': '',
+    '🌐': '',
+    '💡': '',
+    '🔥': '',
+    '⭐': '',
+    '🎉': '',
+}
+
+# Símbolos Unicode y su equivalente LaTeX
+SPECIAL_CHAR_REPLACEMENTS = {
+    'Ω': r'$\Omega$',
+    '°': r'\degree{}',
+    '±': r'$\pm$',
+    'µ': r'$\mu$',
+    '≤': r'$\leq$',
+    '≥': r'$\geq$',
+    '×': r'$\times$',
+    '÷': r'$\div$',
+    '√': r'$\sqrt{}$',
+    '∞': r'$\infty$',
+    'α': r'$\alpha$',
+    'β': r'$\beta$',
+    'γ': r'$\gamma$',
+    'δ': r'$\delta$',
+    'ε': r'$\varepsilon$',
+    'θ': r'$\theta$',
+    'λ': r'$\lambda$',
+    'π': r'$\pi$',
+    'σ': r'$\sigma$',
+    'τ': r'$\tau$',
+    'φ': r'$\phi$',
+    'ω': r'$\omega$',
+    '²': r'$^2$',
+    '³': r'$^3$',
+    '½': r'$\frac{1}{2}$',
+    '¼': r'$\frac{1}{4}$',
+    '¾': r'$\frac{3}{4}$',
+}
+
+# Caracteres especiales de LaTeX en texto plano
+TEXT_ESCAPES = {
+    '%': '\\%',
+    '$': '\\$',
+    '#': '\\#',
+    '^': '\\textasciicircum{}',
+    '_': '\\_',
+    '~': '\\textasciitilde{}',
+    '&': '\\&',
+}
+
+def _build_translation(*tables: Dict[str, str]) -> Dict[int, str]:
+    """Une tablas de sustitución en una tabla para str.translate
+    
+    Los emojis con selector de variante (U+FE0F) se indexan por su primer
+    carácter y el selector se elimina, así cada entrada es un único carácter
+    y todo el escapado es una sola pasada sin volver a escapar lo insertado.
+    """
+    translation = {ord('\ufe0f'): ''}
+    for table in tables:
+        for key, replacement in table.items():
+            translation[ord(key.replace('\ufe0f', ''))] = replacement
+    return translation
+
+# Tablas de escapado construidas una sola vez al importar
+SYMBOL_TRANSLATION = _build_translation(EMOJI_REPLACEMENTS, SPECIAL_CHAR_REPLACEMENTS)
+TEXT_TRANSLATION = _build_translation(TEXT_ESCAPES, EMOJI_REPLACEMENTS, SPECIAL_CHAR_REPLACEMENTS)
+TABLE_ROW_TRANSLATION = {k: v for k, v in TEXT_TRANSLATION.items() if k != ord('&')}
+
+def _build_replacements(translation: Dict[int, str]) -> List[Tuple[str, str]]:
+    """Convierte una tabla de str.translate en pares para str.replace
+    
+    Los caracteres que aparecen dentro de alguna sustitución ($, _, ...) van
+    primero, así ningún reemplazo vuelve a escapar lo que insertó otro y el
+    resultado es idéntico al de translate.
+    """
+    inserted = ''.join(translation.values())
+    pairs = [(chr(code), replacement) for code, replacement in translation.items()]
+    return sorted(pairs, key=lambda pair: pair[0] not in inserted)
+
+SYMBOL_REPLACEMENTS = _build_replacements(SYMBOL_TRANSLATION)
+TEXT_REPLACEMENTS = _build_replacements(TEXT_TRANSLATION)
+
+def replace_all(text: str, replacements: List[Tuple[str, str]]) -> str:
+    """Equivalente a translate para textos largos (documento, tabla entera)
+    
+    translate consulta el diccionario carácter a carácter y con texto no ASCII
+    es lento; str.replace solo recorre el texto por cada carácter presente.
+    En fragmentos cortos translate sigue siendo más rápido.
+    """
+    for char, replacement in replacements:
+        if char in text:
+            text = text.replace(char, replacement)
+    return text
+# Segmentos que escape_latex_chars deja intactos: argumentos literales,
+# fórmulas $...$, comandos y caracteres ya escapados
+LATEX_SEGMENT_PATTERN = re.compile(
+    r'(\\(?:href|url|includegraphics|label|ref|pageref|input)(?:\[[^\]]*\])?\{[^}]*\}'
+    r'|\$[^$]*\$|\\[a-zA-Z]+\*?|\\.)'
+)
+
+# Expresiones del tokenizador de Markdown
+HEADING_PATTERN = re.compile(r'^(#{1,4}) (.+)$')
+HEADING_COMMANDS = {1: 'section', 2: 'subsection', 3: 'subsubsection', 4: 'paragraph'}
+NUMBERED_ITEM_PATTERN = re.compile(r'^\s*\d+\.\s')
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+LATEX_COMMAND_PATTERN = re.compile(r'\\(?:[a-zA-Z]+|.)')
+# Caracteres con los que puede empezar un nodo en línea, y los que importan al
+# buscar el cierre de una cursiva
+INLINE_SPECIAL_PATTERN = re.compile(r'[\\!\[*`$]')
+ITALIC_SCAN_PATTERN = re.compile(r'[\\*`]')
+# Separador para escapar juntas las celdas de una tabla (no lo toca TEXT_TRANSLATION)
+CELL_JOINER = '\x00'
+# $...$ en línea: sin espacio tras la apertura ni antes del cierre, ni dígito después
+INLINE_MATH_PATTERN = re.compile(r'\$(?=\S)[^$]*?(?<=\S)\$(?!\d)')
+RAW_ENVIRONMENT_PATTERN = re.compile(r'\\begin\{([^}]+)\}')
+TABLE_CAPTION_PREFIXES = ('**Table', '**Tabla')
+TABLE_TITLE_PATTERN = re.compile(r'\*\*(?:Table|Tabla)\s+\d+:\s*([^*]+)\*\*')
+TABLE_SEPARATOR_PATTERN = re.compile(r'^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+# '|' separa celdas salvo si está escapado como '\|'
+TABLE_CELL_SEPARATOR = re.compile(r'(?<!\\)\|')
+# Tablas con más filas que esto se emiten como longtable (pueden partirse entre páginas)
+DEFAULT_LONGTABLE_ROWS = 30
+
+@dataclass
+class MarkdownBlock:
+    """Nodo de bloque del AST de Markdown
+    
+    kind es 'heading', 'table', 'list', 'text', 'raw' o 'blank'; line es la
+    línea (1-based) de content.md donde empieza el bloque.
+    """
+    kind: str
+    line: int
+    text: str = ''
+    level: int = 0
+    ordered: bool = False
+    items: List[str] = field(default_factory=list)
+    header: List[str] = field(default_factory=list)
+    rows: List[List[str]] = field(default_factory=list)
+    caption: Optional[str] = None
+
+@dataclass
+class ParsedDocument:
+    """Un idioma leído y analizado una sola vez
+    
+    Lo consumen el emisor de LaTeX y, con --validate, los validadores de
+    validate_standards.py.
+    """
+    lang: str
+    metadata: Dict
+    content: str
+    blocks: List[MarkdownBlock]
+    
+    @property
+    def headings(self) -> List[Tuple[int, str, int]]:
+        """Títulos como (nivel, texto, línea)"""
+        return [(block.level, block.text, block.line)
+                for block in self.blocks if block.kind == 'heading']
+
+def _match_table(lines: List[str], i: int) -> Optional[Tuple[int, List[str]]]:
+    """Si en la línea i empieza una tabla devuelve (fin, líneas de la tabla)"""
+    if '|' not in lines[i] or i + 1 >= len(lines) or '|' not in lines[i + 1]:
+        return None
+    
+    # La tabla abarca las líneas con '|' y las vacías intermedias o finales
+    table_lines = []
+    j = i
+    while j < len(lines) and ('|' in lines[j] or lines[j].strip() == ''):
+        if '|' in lines[j]:
+            table_lines.append(lines[j])
+        j += 1
+    
+    if len(table_lines) < 3:
+        return None
+    return j, table_lines
+
+def _find_table(lines: List[str], i: int) -> Optional[Tuple[int, int, List[str], Optional[str]]]:
+    """Tabla que empieza en la línea i, o título **Table N:** seguido de una tabla
+    
+    Devuelve (inicio, fin, líneas de la tabla, título). El título puede estar
+    hasta 3 líneas antes de la tabla; así se resuelve mirando hacia delante y
+    no hay que recortar lo ya emitido.
+    """
+    table = _match_table(lines, i)
+    if table is not None:
+        return i, table[0], table[1], None
+    
+    caption = lines[i].strip()
+    if caption.startswith(TABLE_CAPTION_PREFIXES):
+        for k in range(i + 1, min(i + 4, len(lines))):
+            table = _match_table(lines, k)
+            if table is not None:
+                return k, table[0], table[1], caption
+    return None
+
+def _split_row(line: str) -> List[str]:
+    """Celdas de una fila markdown, conservando las vacías"""
+    if '\\|' not in line:
+        # Sin \| escapados basta con str.split: los '|' de los extremos dejan
+        # una celda vacía al principio y al final
+        cells = [cell.strip() for cell in line.split('|')]
+        if not cells[0]:
+            del cells[0]
+        if cells and not cells[-1]:
+            cells.pop()
+        return cells
+    row = line.strip()
+    if row.startswith('|'):
+        row = row[1:]
+    if row.endswith('|') and not row.endswith('\\|'):
+        row = row[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in TABLE_CELL_SEPARATOR.split(row)]
+
+def _list_item(line: str) -> Optional[Tuple[bool, str]]:
+    """(numerada, texto) si la línea es un elemento de lista"""
+    stripped = line.strip()
+    if stripped.startswith('- ') or stripped.startswith('* '):
+        return False, stripped[2:].strip()
+    if NUMBERED_ITEM_PATTERN.match(line):
+        return True, re.sub(r'^\s*\d+\.\s*', '', line)
+    return None
+
+def parse_markdown(content: str, split_table=None) -> List[MarkdownBlock]:
+    """Tokeniza el Markdown en bloques en una sola pasada sobre las líneas
+    
+    split_table convierte las líneas de una tabla en (encabezado, filas) o
+    None si no es una tabla válida.
+    """
+    lines = content.split('\n')
+    blocks: List[MarkdownBlock] = []
+    i = 0
+    
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        
+        # Tabla, con su título si está hasta 3 líneas antes
+        table = _find_table(lines, i)
+        if table is not None:
+            start, end, table_lines, caption = table
+            parsed = split_table(table_lines) if split_table else None
+            if parsed is not None:
+                header, rows = parsed
+                blocks.append(MarkdownBlock('table', start + 1, header=header,
+                                            rows=rows, caption=caption))
+                i = end
+                continue
+        
+        heading = HEADING_PATTERN.match(line)
+        item = _list_item(line)
+        if heading:
+            blocks.append(MarkdownBlock('heading', i + 1, text=heading.group(2),
+                                        level=len(heading.group(1))))
+        elif item:
+            ordered, text = item
+            previous = blocks[-1] if blocks else None
+            if previous is not None and previous.kind == 'list' and previous.ordered == ordered:
+                previous.items.append(text)
+            else:
+                blocks.append(MarkdownBlock('list', i + 1, ordered=ordered, items=[text]))
+        elif stripped == '':
+            blocks.append(MarkdownBlock('blank', i + 1, text=line))
+        elif (stripped.startswith('\\') or '\\begin{' in line or '\\end{' in line):
+            # LaTeX escrito a mano: se respeta tal cual, incluido el cuerpo
+            # completo de un entorno \begin{...} ... \end{...}
+            environment = RAW_ENVIRONMENT_PATTERN.match(stripped)
+            end = i
+            if environment:
+                closing = f"\\end{{{environment.group(1)}}}"
+                while end < len(lines) and closing not in lines[end]:
+                    end += 1
+                if end == len(lines):
+                    end = i
+            blocks.append(MarkdownBlock('raw', i + 1, text='\n'.join(lines[i:end + 1])))
+            i = end + 1
+            continue
+        else:
+            blocks.append(MarkdownBlock('text', i + 1, text=line))
+        i += 1
+    
+    return blocks
+
+def _italic_close(text: str, start: int) -> int:
+    """Posición del * que cierra una cursiva cuyo contenido empieza en start
+    
+    Las negritas **…** y el código `…` completos del interior se saltan, de modo
+    que *a **b** c* cierra en el último asterisco. Devuelve -1 si no cierra.
+    """
+    pos = start
+    while True:
+        match = ITALIC_SCAN_PATTERN.search(text, pos)
+        if match is None:
+            return -1
+        pos = match.start()
+        char = match.group()
+        if char == '`':
+            close = text.find('`', pos + 1)
+            if close > pos + 1:
+                pos = close + 1
+                continue
+        elif char == '*':
+            if text.startswith('**', pos):
+                close = text.find('**', pos + 2)
+                if close != -1:
+                    pos = close + 2
+                    continue
+            return pos
+        else:
+            # Un \* escapado no cierra la cursiva
+            pos += 1
+        pos += 1
+
+def parse_inline(text: str) -> List[Tuple]:
+    """Tokeniza el texto de una línea en nodos en línea
+    
+    Nodos: ('text', s), ('raw', s), ('math', s), ('code', s),
+    ('bold', hijos), ('italic', hijos), ('link', hijos, url) e
+    ('image', alt, ruta).
+    """
+    nodes: List[Tuple] = []
+    # El texto pendiente es siempre text[start:pos]: los caracteres de marcado
+    # que no abren ningún nodo se quedan en él tal cual
+    start = pos = 0
+    length = len(text)
+    
+    while True:
+        match = INLINE_SPECIAL_PATTERN.search(text, pos)
+        if match is None:
+            break
+        pos = match.start()
+        char = match.group()
+        node = None
+        end = pos
+        
+        if char == '\\' and pos + 1 < length:
+            # Comando LaTeX o carácter ya escapado
+            match = LATEX_COMMAND_PATTERN.match(text, pos)
+            node, end = ('raw', match.group()), match.end()
+        elif char == '!' and text.startswith('![', pos):
+            match = IMAGE_PATTERN.match(text, pos)
+            if match:
+                node, end = ('image', match.group(1), match.group(2)), match.end()
+        elif char == '[':
+            match = LINK_PATTERN.match(text, pos)
+            if match:
+                node, end = ('link', parse_inline(match.group(1)), match.group(2)), match.end()
+        elif char == '*':
+            if text.startswith('**', pos):
+                close = text.find('**', pos + 2)
+                if close != -1:
+                    node, end = ('bold', parse_inline(text[pos + 2:close])), close + 2
+            else:
+                close = _italic_close(text, pos + 1)
+                if close != -1:
+                    node, end = ('italic', parse_inline(text[pos + 1:close])), close + 1
+        elif char == '`':
+            close = text.find('`', pos + 1)
+            if close > pos + 1:
+                node, end = ('code', text[pos + 1:close]), close + 1
+        elif char == '$':
+            match = INLINE_MATH_PATTERN.match(text, pos)
+            if match:
+                node, end = ('math', match.group()), match.end()
+        
+        if node is None:
+            pos += 1
+        else:
+            if pos > start:
+                nodes.append(('text', text[start:pos]))
+            nodes.append(node)
+            start = pos = end
+    
+    if start < length:
+        nodes.append(('text', text[start:]))
+    return nodes
+
+# Directivas del template estilo Pandoc: $var$, $a.b$, $if(x)$, $else$,
+# $endif$, $for(x)$, $sep$ y $endfor$
+TEMPLATE_DIRECTIVE_PATTERN = re.compile(
+    r'\$(?:(if|for)\(([a-zA-Z_][a-zA-Z0-9_.]*)\)|(else|endif|endfor|sep)|([a-zA-Z_][a-zA-Z0-9_.]*))\$'
+)
+_MISSING = object()
+
+def _lookup(context: Dict, path: Tuple[str, ...]):
+    """Valor de una ruta con puntos dentro del contexto, o _MISSING"""
+    value = context
+    for key in path:
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            return _MISSING
+    return value
+
+class CompiledTemplate:
+    """Template compilado en un plan de renderizado reutilizable
+    
+    El plan es una lista de fragmentos literales y nodos ('var', ruta, texto),
+    ('if', ruta, entonces, sino) y ('for', ruta, cuerpo, separador). Renderizar
+    es un único recorrido lineal; los valores insertados no se vuelven a
+    interpretar como directivas.
+    """
+    
+    def __init__(self, template: str):
+        self.plan = self._parse(template)
+    
+    @staticmethod
+    def _parse(template: str) -> List:
+        """Convierte el texto del template en el plan (condicionales anidados)"""
+        root: List = []
+        # Pila de (directiva, nodo, lista activa)
+        stack: List[Tuple[str, Optional[list], List]] = [('root', None, root)]
+        position = 0
+        
+        for match in TEMPLATE_DIRECTIVE_PATTERN.finditer(template):
+            current = stack[-1][2]
+            if match.start() > position:
+                current.append(template[position:match.start()])
+            position = match.end()
+            
+            block, block_name, keyword, variable = match.groups()
+            opener = stack[-1][0]
+            if block:
+                node = [block, tuple(block_name.split('.')), [], []]
+                current.append(node)
+                stack.append((block, node, node[2]))
+            elif keyword == 'else' and opener == 'if':
+                stack[-1] = ('if', stack[-1][1], stack[-1][1][3])
+            elif keyword == 'sep' and opener == 'for':
+                stack[-1] = ('for', stack[-1][1], stack[-1][1][3])
+            elif (keyword == 'endif' and opener == 'if') or (keyword == 'endfor' and opener == 'for'):
+                stack.pop()
+            elif variable:
+                current.append(('var', tuple(variable.split('.')), match.group()))
+            else:
+                # Directiva sin pareja: se conserva como texto
+                current.append(match.group())
+        
+        if position < len(template):
+            stack[-1][2].append(template[position:])
+        return root
+    
+    def render(self, context: Dict, defaults: Optional[Dict] = None) -> str:
+        """Renderiza el plan con un contexto (y valores por defecto de primer nivel)"""
+        output: List[str] = []
+        self._render(self.plan, context, defaults or {}, output)
+        return ''.join(output)
+    
+    def _render(self, plan: List, context: Dict, defaults: Dict, output: List[str]):
+        for node in plan:
+            if isinstance(node, str):
+                output.append(node)
+                continue
+            
+            kind = node[0]
+            if kind == 'var':
+                value = _lookup(context, node[1])
+                if value is _MISSING or value is None:
+                    value = defaults.get(node[1][0], _MISSING) if len(node[1]) == 1 else _MISSING
+                output.append(node[2] if value is _MISSING else str(value))
+            elif kind == 'if':
+                value = _lookup(context, node[1])
+                branch = node[2] if value is not _MISSING and value else node[3]
+                self._render(branch, context, defaults, output)
+            elif kind == 'for':
+                value = _lookup(context, node[1])
+                if value is _MISSING or not value:
+                    continue
+                items = value if isinstance(value, list) else [value]
+                for index, item in enumerate(items):
+                    if index:
+                        self._render(node[3], context, defaults, output)
+                    # Dentro del bucle $x$ y $it$ se refieren al elemento actual
+                    scope = dict(context)
+                    scope[node[1][-1]] = item
+                    scope['it'] = item
+                    self._render(node[2], scope, defaults, output)
+
+# Templates compilados, por hash de su contenido
+_TEMPLATE_CACHE: Dict[str, CompiledTemplate] = {}
+
+def compile_template(template: str) -> CompiledTemplate:
+    """Compila un template o reutiliza el plan ya compilado para ese contenido"""
+    digest = hashlib.sha256(template.encode('utf-8')).hexdigest()
+    compiled = _TEMPLATE_CACHE.get(digest)
+    _cache_event('template', compiled is not None)
+    if compiled is None:
+        compiled = CompiledTemplate(template)
+        _TEMPLATE_CACHE[digest] = compiled
+    return compiled
+
+class ImageIndex:
+    """Índice de los archivos de un directorio de imágenes
+    
+    Se construye con un único listado del directorio y resuelve referencias
+    por nombre exacto, nombre sin distinguir mayúsculas, stem, clave
+    normalizada y, como último recurso, coincidencia parcial (la misma regla
+    que usaba process_images). Las coincidencias parciales se ordenan de forma
+    determinista y se avisa cuando una referencia es ambigua.
+    """
+    
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.mtime_ns = self.directory_mtime(directory)
+        self.files: List[Path] = []
+        if directory.is_dir():
+            self.files = sorted(p for p in directory.iterdir() if p.is_file())
+        
+        self.by_name: Dict[str, Path] = {}
+        self.by_lower_name: Dict[str, List[Path]] = {}
+        self.by_stem: Dict[str, List[Path]] = {}
+        self.by_key: Dict[str, List[Path]] = {}
+        for path in self.files:
+            self.by_name[path.name] = path
+            self.by_lower_name.setdefault(path.name.lower(), []).append(path)
+            self.by_stem.setdefault(path.stem.lower(), []).append(path)
+            self.by_key.setdefault(self.normalize(path.stem), []).append(path)
+        self._reported: set = set()
+    
+    @staticmethod
+    def directory_mtime(directory: Path) -> Optional[int]:
+        """mtime del directorio (cambia al añadir, quitar o renombrar archivos)"""
+        try:
+            return directory.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Clave normalizada: minúsculas y solo caracteres alfanuméricos"""
+        return re.sub(r'[^a-z0-9]', '', name.lower())
+    
+    def exact(self, reference: str) -> Optional[Path]:
+        """Archivo con exactamente ese nombre (o ruta relativa) en el directorio"""
+        if '/' in reference:
+            path = self.directory / reference
+            return path if path.is_file() else None
+        return self.by_name.get(reference)
+    
+    def find(self, reference: str) -> Optional[Path]:
+        """Mejor coincidencia para una referencia, o None"""
+        if not self.files:
+            return None
+        
+        lower = reference.lower()
+        stem = Path(lower).stem
+        for candidates in (self.by_lower_name.get(lower),
+                           self.by_stem.get(stem),
+                           self.by_key.get(self.normalize(stem))):
+            if candidates:
+                return self._pick(reference, candidates)
+        
+        # Coincidencia parcial: la referencia contiene el stem del archivo o
+        # el nombre del archivo contiene la referencia. Se prefiere el stem de
+        # longitud más parecida y, a igualdad, el orden alfabético.
+        candidates = [
+            path for path in self.files
+            if lower in path.name.lower() or path.stem.lower() in lower
+        ]
+        if not candidates:
+            return None
+        candidates.sort(key=lambda p: (abs(len(p.stem) - len(stem)), p.name))
+        return self._pick(reference, candidates)
+    
+    def _pick(self, reference: str, candidates: List[Path]) -> Path:
+        """Elige el primer candidato y avisa una vez si hay más de uno"""
+        chosen = candidates[0]
+        if len(candidates) > 1 and reference not in self._reported:
+            self._reported.add(reference)
+            others = ', '.join(p.name for p in candidates[1:4])
+            logger.warning(f"⚠️  Imagen ambigua '{reference}' en {self.directory}: "
+                           f"se usa {chosen.name} (también: {others})")
+        return chosen
+
+# Diagnósticos de pdflatex (salida con -file-line-error y líneas sin cortar)
+FILE_LINE_ERROR_PATTERN = re.compile(r'^(?P<file>[^:\s][^:]*\.(?:tex|sty|cls|cfg|def)):(?P<line>\d+): (?P<message>.+)$')
+TEX_ERROR_PATTERN = re.compile(r'^! (?P<message>.+)$')
+TEX_ERROR_LINE_PATTERN = re.compile(r'^l\.(?P<line>\d+)')
+MISSING_FILE_PATTERN = re.compile(r"File `(?P<name>[^']+)' not found")
+OVERFULL_PATTERN = re.compile(r'^Overfull \\[hv]box \((?P<amount>[^)]+)\) .*?lines? (?P<line>\d+)')
+UNDEFINED_REFERENCE_PATTERN = re.compile(
+    r"(?P<kind>Reference|Citation) `(?P<name>[^']+)' on page \d+ undefined on input line (?P<line>\d+)")
+# Errores tras los que pdflatex no puede seguir: se detiene la pasada enseguida
+FATAL_PATTERN = re.compile(r'Emergency stop|Fatal error|TeX capacity exceeded|'
+                           r"I can't find file|==> Fatal")
+# Diagnósticos que se muestran por compilación (el resto solo se cuentan)
+MAX_REPORTED_DIAGNOSTICS = 10
+
+@dataclass
+class PdflatexDiagnostic:
+    """Un error o aviso de pdflatex, con su línea en el .tex y en content.md"""
+    kind: str  # error, fatal, missing_figure, overfull, undefined_reference, rerun
+    message: str
+    line: Optional[int] = None
+    file: Optional[str] = None
+    source_line: Optional[int] = None
+    
+    def describe(self) -> str:
+        location = f"{self.file or 'tex'}:{self.line}" if self.line else (self.file or '')
+        if self.source_line:
+            location += f" (content.md:{self.source_line})"
+        return f"[{self.kind}] {location} {self.message}".replace('  ', ' ')
+
+class PdflatexLogParser:
+    """Analiza la salida de pdflatex línea a línea mientras se produce
+    
+    feed() devuelve los diagnósticos nuevos de cada línea; fatal indica que la
+    pasada no puede terminar bien y conviene detenerla.
+    """
+    
+    def __init__(self, source_map: Optional[List[Tuple[int, int]]] = None):
+        self.source_map = source_map or []
+        self._source_starts = [tex_line for tex_line, _ in self.source_map]
+        self.diagnostics: List[PdflatexDiagnostic] = []
+        self.fatal = False
+        self.rerun_requested = False
+        self._pending: Optional[PdflatexDiagnostic] = None
+    
+    def source_line(self, tex_line: Optional[int]) -> Optional[int]:
+        """Línea de content.md que produjo una línea del .tex"""
+        if not tex_line or not self.source_map:
+            return None
+        index = bisect.bisect_right(self._source_starts, tex_line) - 1
+        return self.source_map[index][1] if index >= 0 else None
+    
+    def feed(self, line: str) -> List[PdflatexDiagnostic]:
+        line = line.rstrip('\n')
+        found = []
+        
+        error = FILE_LINE_ERROR_PATTERN.match(line)
+        tex_error = TEX_ERROR_PATTERN.match(line)
+        error_line = TEX_ERROR_LINE_PATTERN.match(line)
+        if error:
+            found.append(self._error(error.group('message'), int(error.group('line')),
+                                     error.group('file')))
+        elif tex_error:
+            # Sin -file-line-error la línea llega después como "l.<n>"
+            self._pending = self._error(tex_error.group('message'))
+            found.append(self._pending)
+        elif error_line and self._pending is not None:
+            self._pending.line = int(error_line.group('line'))
+            self._pending.source_line = self.source_line(self._pending.line)
+            self._pending = None
+        elif FATAL_PATTERN.search(line) and not self.fatal:
+            self.fatal = True
+            found.append(PdflatexDiagnostic('fatal', line.strip()))
+        
+        overfull = OVERFULL_PATTERN.match(line)
+        if overfull:
+            tex_line = int(overfull.group('line'))
+            found.append(PdflatexDiagnostic('overfull', f"Overfull box ({overfull.group('amount')})",
+                                            tex_line, source_line=self.source_line(tex_line)))
+        
+        undefined = UNDEFINED_REFERENCE_PATTERN.search(line)
+        if undefined:
+            tex_line = int(undefined.group('line'))
+            found.append(PdflatexDiagnostic('undefined_reference',
+                                            f"{undefined.group('kind')} '{undefined.group('name')}' undefined",
+                                            tex_line, source_line=self.source_line(tex_line)))
+        
+        if RERUN_PATTERN.search(line):
+            self.rerun_requested = True
+            found.append(PdflatexDiagnostic('rerun', line.strip()))
+        
+        self.diagnostics.extend(found)
+        return found
+    
+    def _error(self, message: str, line: Optional[int] = None,
+               file: Optional[str] = None) -> PdflatexDiagnostic:
+        missing = MISSING_FILE_PATTERN.search(message)
+        if FATAL_PATTERN.search(message):
+            kind = 'fatal'
+            self.fatal = True
+        elif missing and Path(missing.group('name')).suffix.lower() in ('', '.png', '.jpg', '.jpeg', '.pdf', '.eps'):
+            kind = 'missing_figure'
+        else:
+            kind = 'error'
+        return PdflatexDiagnostic(kind, message.strip(), line, file, self.source_line(line))
+    
+    @property
+    def pending(self) -> bool:
+        """Hay un error cuya línea (l.<n>) aún no ha llegado"""
+        return self._pending is not None
+    
+    @property
+    def errors(self) -> List[PdflatexDiagnostic]:
+        return [d for d in self.diagnostics if d.kind in ('error', 'fatal', 'missing_figure')]
 
 class LatexDocGenerator:
-    def __init__(self, base_dir: str = "."):
+    def __init__(self, base_dir: str = ".", max_passes: int = DEFAULT_MAX_PASSES,
+                 use_format: bool = True, optimize_images: bool = False,
+                 image_dpi: int = DEFAULT_IMAGE_DPI, jpeg_quality: int = DEFAULT_JPEG_QUALITY,
+                 longtable_rows: int = DEFAULT_LONGTABLE_ROWS, draft: bool = False,
+                 sections: Optional[List[str]] = None, cache_dir: Optional[str] = None,
+                 halt_on_error: bool = True, validate: bool = False,
+                 standards_file: Optional[str] = None):
         self.base_dir = Path(base_dir)
         self.docs_dir = self.base_dir / "docs"
         self.images_dir = self.base_dir / "images"
         self.template_file = self.base_dir / "template.tex"
+        self.build_manifest_file = self.docs_dir / ".build-cache.json"
+        # Máximo de pasadas de pdflatex por documento
+        self.max_passes = max(1, max_passes)
+        # Cachés de compilación: formatos y almacén de imágenes por contenido
+        # (compartibles entre productos con cache_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.docs_dir / ".build-cache"
+        self.use_format = use_format
+        self.format_dir = self.cache_dir / "formats"
+        self.objects_dir = self.cache_dir / "objects"
+        # YAML ya analizado (metadatos, estándares), en memoria y en disco
+        self.yaml_cache = YamlCache(self.cache_dir / "yaml")
+        # Optimización opcional de imágenes para impresión
+        self.optimize_images = optimize_images
+        self.image_dpi = image_dpi
+        self.jpeg_quality = jpeg_quality
+        # Filas a partir de las cuales una tabla se emite como longtable
+        self.longtable_rows = longtable_rows
+        # Detener la compilación ante el primer error de pdflatex
+        self.halt_on_error = halt_on_error
+        # Líneas del .tex -> content.md de cada idioma generado
+        self.source_maps: Dict[str, List[Tuple[int, int]]] = {}
+        # Modo borrador: imágenes como cajas, una sola pasada real y solo
+        # las secciones pedidas (títulos, sin distinguir mayúsculas)
+        self.draft = draft
+        self.sections = [section.strip().lower() for section in sections or [] if section.strip()]
+        # Hashes ya calculados, por (ruta, tamaño, mtime)
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        # Índices de imágenes compartidos por todos los idiomas
+        self._image_indexes: Dict[Path, ImageIndex] = {}
+        # Entradas (hashes) de los idiomas compilados en este proceso
+        self.built_inputs: Dict[str, Dict[str, str]] = {}
+        # Informe (tiempos, bytes, cachés) de la última compilación de cada idioma
+        self.reports: Dict[str, Dict] = {}
+        # Imágenes de las que depende cada idioma (referencia -> archivo)
+        self.image_dependencies: Dict[str, Dict[str, Optional[Path]]] = {}
+        # Logos que carga la plantilla de cada idioma (nombre -> archivo)
+        self.logo_dependencies: Dict[str, Dict[str, Optional[Path]]] = {}
+        # Validación de estándares sobre el mismo documento que se compila
+        self.validate = validate
+        if standards_file:
+            self.standards_file = Path(standards_file)
+        elif (self.base_dir / "document_standards.yaml").exists():
+            self.standards_file = self.base_dir / "document_standards.yaml"
+        else:
+            self.standards_file = DEFAULT_STANDARDS_FILE
+        self._standards: Optional[Dict] = None
+        # Resultado de la validación de cada idioma (validate_standards.validate_parsed)
+        self.validation: Dict[str, Dict] = {}
+    
+    def prepare_output_dirs(self):
+        """Crea docs/ y coloca los archivos esenciales antes de compilar
         
-        # Crear directorios
+        El constructor no toca el sistema de archivos; esto se hace al compilar
+        desde los directorios del proyecto (build_language, generate_all).
+        """
         self.docs_dir.mkdir(exist_ok=True)
-        self.images_dir.mkdir(exist_ok=True)
         
         # Copiar archivos esenciales (logo, etc.)
         self.copy_essential_files()
     
+    def essential_file(self) -> Optional[Path]:
+        """Logo de images/ que copy_essential_files coloca en docs/"""
+        for filename in ESSENTIAL_FILES:
+            source_path = self.images_dir / filename
+            if source_path.exists():
+                return source_path
+        return None
+    
     def copy_essential_files(self):
         """Copia archivos esenciales como logos"""
-        essential_files = ['logo.png', 'logo.jpg', 'logo.jpeg']
+        source_path = self.essential_file()
+        if source_path is not None:
+            dest_path = self.docs_dir / source_path.name
+            if self.stage_file(source_path, dest_path):
+                logger.info(f"✅ Copied {source_path.name} to docs/")
+    
+    def logo_files(self, lang: str) -> Dict[str, Optional[Path]]:
+        """Logos que carga la plantilla de un idioma y el archivo del que salen
         
-        for filename in essential_files:
-            source_path = self.images_dir / filename
-            if source_path.exists():
-                dest_path = self.docs_dir / filename
-                shutil.copy2(source_path, dest_path)
-                print(f"✅ Copied {filename} to docs/")
-                break
+        Incluye el archivo esencial que se copia a docs/ y el logo de
+        metadata.yaml (clave logo), resuelto contra images/ y docs/. El
+        resultado queda en self.logo_dependencies para --watch.
+        """
+        logos = {}
+        essential = self.essential_file()
+        if essential is not None:
+            logos[essential.name] = essential
+        logo = self.load_metadata(lang).get('logo')
+        if isinstance(logo, str) and logo and logo not in logos:
+            source_path = self.images_dir / logo
+            logos[logo] = source_path if source_path.exists() else self.docs_dir / logo
+        self.logo_dependencies[lang] = logos
+        return logos
+    
+    def file_digest(self, path: Path) -> str:
+        """SHA-256 de un archivo, recordado mientras no cambie su tamaño o mtime"""
+        stat = path.stat()
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(key)
+        _cache_event('digest', digest is not None)
+        if digest is None:
+            digest = _file_sha256(path)
+            self._digests[key] = digest
+        return digest
+    
+    def stage_file(self, source_path: Path, dest_path: Path) -> bool:
+        """Coloca source_path en dest_path a través del almacén por contenido
+        
+        Cada contenido distinto se guarda una sola vez en
+        docs/.build-cache/objects/<sha256><ext> y se enlaza en su destino
+        (hardlink, reflink o, en último caso, copia). Devuelve False si el
+        destino ya estaba al día.
+        """
+        import shutil
+        digest = self.file_digest(source_path)
+        stored = self.objects_dir / f"{digest}{source_path.suffix.lower()}"
+        _cache_event('object_store', stored.exists())
+        if not stored.exists():
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = stored.with_name(f"{stored.name}.{_writer_id()}.tmp")
+            shutil.copy2(source_path, tmp_file)
+            os.replace(tmp_file, stored)
+        
+        if dest_path.exists() and os.path.samefile(dest_path, stored):
+            return False
+        
+        # Enlazar con un nombre temporal y reemplazar, para no dejar el
+        # destino a medias si otro trabajo lo está leyendo
+        tmp_dest = dest_path.with_name(f".{dest_path.name}.{_writer_id()}.tmp")
+        tmp_dest.unlink(missing_ok=True)
+        _link_or_copy(stored, tmp_dest)
+        os.replace(tmp_dest, dest_path)
+        _count_bytes('images_staged', stored.stat().st_size)
+        return True
     
     def find_language_dirs(self) -> List[str]:
         """Encuentra directorios de idiomas"""
@@ -52,120 +1161,244 @@ class LatexDocGenerator:
         """Carga metadatos"""
         metadata_file = self.base_dir / lang_dir / "metadata.yaml"
         try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
+            metadata, _, hit = self.yaml_cache.load_entry(metadata_file)
+            _cache_event('yaml', hit)
+            return metadata or {}
         except Exception as e:
-            print(f"Error cargando metadatos para {lang_dir}: {e}")
+            logger.error(f"Error cargando metadatos para {lang_dir}: {e}")
             return {}
     
-    def process_markdown(self, content: str, lang_dir: str) -> str:
-        """Procesa markdown a LaTeX"""
+    def process_markdown(self, content: str, lang_dir: str,
+                         source_map: Optional[List[Tuple[int, int]]] = None,
+                         blocks: Optional[List[MarkdownBlock]] = None) -> str:
+        """Procesa markdown a LaTeX
+        
+        El Markdown se tokeniza en una sola pasada (parse_markdown) y el AST
+        resultante se emite como LaTeX; el escapado se aplica solo a los nodos
+        de texto, antes de envolverlos en comandos. Si ya se analizó
+        (parse_document) se pasan los bloques en blocks.
+        """
+        if blocks is None:
+            with _stage('markdown.parse'):
+                blocks = parse_markdown(content, split_table=self.split_table)
+        if self.sections:
+            with _stage('markdown.sections'):
+                blocks = self.select_sections(blocks)
+        with _stage('markdown.emit'):
+            return self.emit_latex(blocks, lang_dir, source_map)
+    
+    def select_sections(self, blocks: List[MarkdownBlock]) -> List[MarkdownBlock]:
+        """Deja solo las secciones cuyo título contiene alguno de self.sections
         
-        # 1. Headers
-        content = re.sub(r'^# (.+)$', r'\\section{\1}', content, flags=re.MULTILINE)
-        content = re.sub(r'^## (.+)$', r'\\subsection{\1}', content, flags=re.MULTILINE)
-        content = re.sub(r'^### (.+)$', r'\\subsubsection{\1}', content, flags=re.MULTILINE)
-        content = re.sub(r'^#### (.+)$', r'\\paragraph{\1}', content, flags=re.MULTILINE)
+        Cada sección seleccionada incluye sus subsecciones, hasta el siguiente
+        título del mismo nivel o superior.
+        """
+        selected = []
+        level = None
+        for block in blocks:
+            if block.kind == 'heading':
+                if level is not None and block.level <= level:
+                    level = None
+                title = block.text.lower()
+                if level is None and any(section in title for section in self.sections):
+                    level = block.level
+            if level is not None:
+                selected.append(block)
+        return selected
+    
+    def emit_latex(self, blocks: List[MarkdownBlock], lang_dir: str,
+                   source_map: Optional[List[Tuple[int, int]]] = None) -> str:
+        """Convierte el AST de bloques en LaTeX
+        
+        Si se pasa source_map se rellena con pares (línea de salida, línea de
+        content.md) donde empieza cada bloque.
+        """
+        result = []
+        anchors = []
+        
+        for block in blocks:
+            anchors.append((len(result), block.line))
+            if block.kind == 'heading':
+                command = HEADING_COMMANDS[block.level]
+                result.append(f"\\{command}{{{self.render_inline(block.text, lang_dir)}}}")
+            elif block.kind == 'table':
+                header, *rows = self.render_cells([block.header, *block.rows], lang_dir)
+                caption = self.render_inline(self.table_caption(block.caption), lang_dir)
+                result.append(self.format_table(header, rows, caption))
+            elif block.kind == 'list':
+                environment = 'enumerate' if block.ordered else 'itemize'
+                result.append(f"\\begin{{{environment}}}")
+                for item in block.items:
+                    result.append(f"\\item {self.render_inline(item, lang_dir)}")
+                result.append(f"\\end{{{environment}}}")
+            elif block.kind == 'raw':
+                result.append(self.replace_symbols(block.text))
+            elif block.kind == 'blank':
+                result.append(block.text)
+            else:
+                result.append(self.render_inline(block.text, lang_dir))
+        
+        if source_map is not None:
+            entry_lines = []
+            line = 1
+            for entry in result:
+                entry_lines.append(line)
+                line += entry.count('\n') + 1
+            source_map.extend((entry_lines[index], md_line) for index, md_line in anchors
+                              if index < len(result))
+        return '\n'.join(result)
+    
+    def render_inline(self, text: str, lang_dir: str) -> str:
+        """Convierte el texto de una línea (negritas, código, enlaces...) a LaTeX"""
+        # Sin caracteres de marcado (la mayoría de las celdas) solo hay que escapar
+        if INLINE_SPECIAL_PATTERN.search(text) is None:
+            return self.escape_text(text)
+        return ''.join(self._render_nodes(parse_inline(text), lang_dir))
+    
+    def render_cells(self, rows: List[List[str]], lang_dir: str) -> List[List[str]]:
+        """render_inline de todas las celdas de una tabla
+        
+        Las celdas se escapan juntas en una sola pasada de replace_all; solo las
+        que contienen caracteres de marcado pasan además por el tokenizador.
+        """
+        cells = [cell for row in rows for cell in row]
+        joined = CELL_JOINER.join(cells)
+        rendered = replace_all(joined, TEXT_REPLACEMENTS).split(CELL_JOINER)
+        if len(rendered) != len(cells):
+            # Alguna celda contenía el separador
+            rendered = [cell.translate(TEXT_TRANSLATION) for cell in cells]
         
-        # 2. Imágenes ANTES de procesar otros elementos
-        content = self.process_images(content, lang_dir)
+        # Las celdas repetidas (unidades, $\pm$, **Sí**...) se tokenizan una vez
+        markup: Dict[str, str] = {}
+        search = INLINE_SPECIAL_PATTERN.search
+        for index, cell in enumerate(cells):
+            if search(cell) is not None:
+                if cell not in markup:
+                    markup[cell] = ''.join(self._render_nodes(parse_inline(cell), lang_dir))
+                rendered[index] = markup[cell]
         
-        # 3. Tablas
-        content = self.process_tables(content)
+        result = []
+        position = 0
+        for row in rows:
+            result.append(rendered[position:position + len(row)])
+            position += len(row)
+        return result
+    
+    def _render_nodes(self, nodes: List[Tuple], lang_dir: str) -> List[str]:
+        """Emite una lista de nodos en línea"""
+        parts = []
+        for node in nodes:
+            kind = node[0]
+            if kind == 'text':
+                parts.append(self.escape_text(node[1]))
+            elif kind in ('raw', 'math'):
+                parts.append(node[1])
+            elif kind == 'code':
+                parts.append(f"\\texttt{{{self.escape_text(node[1])}}}")
+            elif kind == 'bold':
+                parts.append(f"\\textbf{{{''.join(self._render_nodes(node[1], lang_dir))}}}")
+            elif kind == 'italic':
+                parts.append(f"\\textit{{{''.join(self._render_nodes(node[1], lang_dir))}}}")
+            elif kind == 'link':
+                parts.append(f"\\href{{{node[2]}}}{{{''.join(self._render_nodes(node[1], lang_dir))}}}")
+            elif kind == 'image':
+                alt_text = self.render_inline(node[1], lang_dir)
+                figure = self.render_image(alt_text, node[2], lang_dir)
+                parts.append(figure or self.escape_text(f"[Imagen no encontrada: {node[2]}]"))
+        return parts
+    
+    def escape_text(self, text: str) -> str:
+        """Escapa un fragmento de texto plano (sin comandos LaTeX) y sus símbolos"""
+        return text.translate(TEXT_TRANSLATION)
+    
+    def replace_symbols(self, text: str) -> str:
+        """Sustituye emojis y símbolos Unicode por su equivalente LaTeX"""
+        return text.translate(SYMBOL_TRANSLATION)
+    
+    def image_index(self, directory: Path) -> 'ImageIndex':
+        """Índice de un directorio de imágenes, reconstruido solo si el directorio cambia"""
+        index = self._image_indexes.get(directory)
+        fresh = index is not None and index.mtime_ns == ImageIndex.directory_mtime(directory)
+        _cache_event('image_index', fresh)
+        if not fresh:
+            index = ImageIndex(directory)
+            self._image_indexes[directory] = index
+        return index
+    
+    def build_image_indexes(self):
+        """Construye los índices antes de repartir trabajos entre idiomas"""
+        self.image_index(self.docs_dir / "resources")
+        self.image_index(self.images_dir / "resources")
+    
+    def invalidate_image_indexes(self):
+        """Descarta los índices (p. ej. si cambian los directorios de imágenes)"""
+        self._image_indexes.clear()
+    
+    def resolve_image(self, image_path: str, lang_dir: str) -> Tuple[Optional[str], Optional[Path]]:
+        """Resuelve una referencia de imagen: (nombre en docs/, origen a copiar)"""
+        # Buscar imagen en docs/resources/ (ya copiadas por workflow) o docs/
+        docs_resources = self.image_index(self.docs_dir / "resources")
         
-        # 4. Listas
-        content = self.process_lists(content)
+        # Opción 1: nombre exacto en docs/resources/ (copiadas por workflow)
+        if image_path.startswith('resources/'):
+            clean_path = image_path.replace('resources/', '')
+            if docs_resources.exact(clean_path):
+                return f"resources/{clean_path}", None
         
-        # 5. Formato de texto
-        content = re.sub(r'\*\*(.*?)\*\*', r'\\textbf{\1}', content)
-        content = re.sub(r'\*(.*?)\*(?!\*)', r'\\textit{\1}', content)
-        content = re.sub(r'`([^`]+)`', r'\\texttt{\1}', content)
+        # Opción 2: buscar por nombre parcial en docs/resources/
+        clean_path = image_path.replace('resources/', '').replace('images/', '')
+        img_file = docs_resources.find(clean_path)
+        if img_file:
+            return f"resources/{img_file.name}", None
         
-        # 6. Enlaces
-        content = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'\\href{\2}{\1}', content)
+        # Opción 3: buscar en docs/ directamente
+        if (self.docs_dir / clean_path).exists():
+            return clean_path, None
         
-        # 7. Escapar caracteres especiales AL FINAL
-        content = self.escape_latex_chars(content)
+        # Opción 4: fallback - copiar desde images/resources/ si workflow no lo hizo
+        if image_path.startswith('resources/') or not image_path.startswith('images/'):
+            clean_path = image_path.replace('resources/', '')
+            resources = self.image_index(self.images_dir / "resources")
+            source_path = resources.exact(clean_path) or resources.find(clean_path)
+            if source_path:
+                return f"{lang_dir}_{source_path.name}", source_path
         
-        return content
+        return None, None
     
     def process_images(self, content: str, lang_dir: str) -> str:
         """Procesa imágenes markdown"""
         def replace_image(match):
-            alt_text = match.group(1)
             image_path = match.group(2)
+            figure = self.render_image(match.group(1), image_path, lang_dir)
+            return figure or f"[Imagen no encontrada: {image_path}]"
+        
+        return IMAGE_PATTERN.sub(replace_image, content)
+    
+    def render_image(self, alt_text: str, image_path: str, lang_dir: str) -> Optional[str]:
+        """Figura LaTeX para una imagen (alt_text ya convertido a LaTeX); None si no existe"""
+        with _stage('images.resolve'):
+            dest_filename, source_path = self.resolve_image(image_path, lang_dir)
+        
+        if dest_filename:
+            # Determinar ancho basado en el tipo de imagen
+            fraction = self.image_width_fraction(dest_filename)
+            width = "\\textwidth" if fraction == 1.0 else f"{fraction}\\textwidth"
             
-            # Buscar imagen en docs/resources/ (ya copiadas por workflow) o docs/
-            dest_filename = None
-            
-            # Opción 1: buscar en docs/resources/ (copiadas por workflow)
-            if image_path.startswith('resources/'):
-                clean_path = image_path.replace('resources/', '')
-                docs_resource_path = self.docs_dir / "resources" / clean_path
-                if docs_resource_path.exists():
-                    dest_filename = f"resources/{clean_path}"
-            
-            # Opción 2: buscar por nombre parcial en docs/resources/
-            if not dest_filename:
-                clean_path = image_path.replace('resources/', '').replace('images/', '')
-                docs_resources_dir = self.docs_dir / "resources"
-                if docs_resources_dir.exists():
-                    for img_file in docs_resources_dir.glob("*"):
-                        if (clean_path.lower() in img_file.name.lower() or 
-                            img_file.stem.lower() in clean_path.lower()):
-                            dest_filename = f"resources/{img_file.name}"
-                            break
-            
-            # Opción 3: buscar en docs/ directamente
-            if not dest_filename:
-                clean_path = image_path.replace('resources/', '').replace('images/', '')
-                docs_image_path = self.docs_dir / clean_path
-                if docs_image_path.exists():
-                    dest_filename = clean_path
+            if self.optimize_images and not self.draft:
+                # Reducir la imagen a la resolución que necesita ese ancho
+                original = source_path or self.docs_dir / dest_filename
+                with _stage('images.optimize'):
+                    optimized = self.optimize_image(original, fraction)
+                if optimized is not None:
+                    source_path = optimized
+                    dest_filename = f"{lang_dir}_{original.name}"
             
-            # Opción 4: fallback - copiar desde images/ si workflow no lo hizo
-            if not dest_filename:
-                source_path = None
-                
-                # Buscar en images/resources/
-                if image_path.startswith('resources/') or not image_path.startswith('images/'):
-                    clean_path = image_path.replace('resources/', '')
-                    resource_path = self.images_dir / "resources" / clean_path
-                    
-                    if resource_path.exists():
-                        source_path = resource_path
-                        dest_filename = f"{lang_dir}_{resource_path.name}"
-                    else:
-                        # Buscar por nombre parcial en resources
-                        resources_dir = self.images_dir / "resources"
-                        if resources_dir.exists():
-                            for img_file in resources_dir.glob("*"):
-                                if (clean_path.lower() in img_file.name.lower() or 
-                                    img_file.stem.lower() in clean_path.lower()):
-                                    source_path = img_file
-                                    dest_filename = f"{lang_dir}_{img_file.name}"
-                                    break
-                
-                # Copiar imagen si la encontramos
-                if source_path and source_path.exists():
-                    dest_path = self.docs_dir / dest_filename
-                    shutil.copy2(source_path, dest_path)
+            # Enlazar la imagen si la encontramos fuera de docs/
+            if source_path and source_path.exists():
+                with _stage('images.stage'):
+                    self.stage_file(source_path, self.docs_dir / dest_filename)
             
-            if dest_filename:
-                # Determinar ancho basado en el tipo de imagen
-                width = "0.8\\textwidth"
-                name_lower = dest_filename.lower()
-                
-                if any(keyword in name_lower for keyword in ['pinout', 'pin_out', 'diagram']):
-                    width = "0.9\\textwidth"
-                elif any(keyword in name_lower for keyword in ['dimension', 'size', 'physical']):
-                    width = "0.6\\textwidth"
-                elif any(keyword in name_lower for keyword in ['schematic', 'circuit']):
-                    width = "\\textwidth"
-                elif any(keyword in name_lower for keyword in ['block', 'topology', 'top', 'btm']):
-                    width = "0.7\\textwidth"
-                
-                return f'''
+            return f'''
 \\begin{{figure}}[H]
 \\centering
 \\includegraphics[width={width}]{{{dest_filename}}}
@@ -174,120 +1407,196 @@ class LatexDocGenerator:
 \\end{{figure}}
 
 '''
-            
-            return f"[Imagen no encontrada: {image_path}]"
         
-        return re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', replace_image, content)
+        return None
+    
+    def image_width_fraction(self, filename: str) -> float:
+        """Fracción de \\textwidth que ocupa una imagen según su nombre"""
+        name_lower = filename.lower()
+        for keywords, fraction in IMAGE_WIDTH_RULES:
+            if any(keyword in name_lower for keyword in keywords):
+                return fraction
+        return DEFAULT_IMAGE_WIDTH
+    
+    def optimize_image(self, source_path: Path, fraction: float) -> Optional[Path]:
+        """Versión de la imagen reducida al ancho impreso, cacheada por hash y ancho
+        
+        Requiere Pillow; sin él (o si la imagen no se puede abrir) devuelve None
+        y se usa el original. Los JPEG se recomprimen con la calidad indicada y
+        los PNG sin pérdida.
+        """
+        import shutil
+        try:
+            from PIL import Image
+        except ImportError:
+            logger.warning("⚠️  Pillow no está instalado, se omite la optimización de imágenes")
+            self.optimize_images = False
+            return None
+        
+        target_px = math.ceil(fraction * TEXTWIDTH_INCHES * self.image_dpi)
+        suffix = source_path.suffix.lower()
+        digest = self.file_digest(source_path)
+        cached = self.cache_dir / "optimized" / f"{digest}-{target_px}px-q{self.jpeg_quality}{suffix}"
+        _cache_event('optimized_images', cached.exists())
+        if cached.exists():
+            return cached
+        
+        try:
+            with Image.open(source_path) as image:
+                if image.width > target_px:
+                    height = round(image.height * target_px / image.width)
+                    image = image.resize((target_px, height), Image.LANCZOS)
+                
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cached.with_name(f"{cached.stem}.{_writer_id()}.tmp{suffix}")
+                if suffix in ('.jpg', '.jpeg'):
+                    image.convert('RGB').save(tmp_file, 'JPEG', quality=self.jpeg_quality,
+                                              optimize=True, progressive=True)
+                else:
+                    image.save(tmp_file, optimize=True)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo optimizar {source_path.name}: {e}")
+            return None
+        
+        # Si no se ganó nada se guarda el original tal cual
+        if tmp_file.stat().st_size >= source_path.stat().st_size:
+            shutil.copy2(source_path, tmp_file)
+        os.replace(tmp_file, cached)
+        return cached
     
     def process_tables(self, content: str) -> str:
-        """Procesa tablas markdown con títulos"""
+        """Procesa tablas markdown con títulos en una sola pasada hacia delante"""
         lines = content.split('\n')
         result = []
         i = 0
         
         while i < len(lines):
-            line = lines[i]
+            table = _find_table(lines, i)
+            if table is not None:
+                start, end, table_lines, table_title = table
+                # Cada tabla se separa una sola vez
+                parsed = self.split_table(table_lines)
+                if parsed is not None:
+                    header_parts, data_rows = parsed
+                    result.append(self.format_table(header_parts, data_rows,
+                                                    self.table_caption(table_title)))
+                    i = end
+                    continue
             
-            # Detectar tabla
-            if '|' in line and i + 1 < len(lines) and '|' in lines[i + 1]:
-                # Buscar título de tabla en las líneas anteriores
-                table_title = None
-                
-                # Buscar hacia atrás hasta 3 líneas para encontrar título
-                for j in range(max(0, i-3), i):
-                    if lines[j].strip().startswith('**Table') or lines[j].strip().startswith('**Tabla'):
-                        table_title = lines[j].strip()
-                        # Remover el título de result si ya fue agregado
-                        if len(result) >= (i - j):
-                            result = result[:-(i - j)]
-                        break
-                
-                table_lines = []
-                j = i
-                
-                # Recoger líneas de tabla
-                while j < len(lines) and ('|' in lines[j] or lines[j].strip() == ''):
-                    if '|' in lines[j]:
-                        table_lines.append(lines[j])
-                    j += 1
-                
-                if len(table_lines) >= 3:
-                    latex_table = self.convert_table(table_lines, table_title)
-                    result.append(latex_table)
-                    i = j
-                else:
-                    result.append(line)
-                    i += 1
-            else:
-                result.append(line)
-                i += 1
+            result.append(lines[i])
+            i += 1
         
         return '\n'.join(result)
     
     def convert_table(self, table_lines: List[str], table_title: str = None) -> str:
         """Convierte tabla a LaTeX con título opcional"""
-        if len(table_lines) < 3:
+        parsed = self.split_table(table_lines)
+        if parsed is None:
             return '\n'.join(table_lines)
         
+        header_parts, data_rows = parsed
+        return self.format_table(header_parts, data_rows, self.table_caption(table_title))
+    
+    def split_table(self, table_lines: List[str]) -> Optional[Tuple[List[str], List[List[str]]]]:
+        """Separa una tabla markdown en (encabezado, filas); None si no es válida
+        
+        Las celdas vacías se conservan y cada fila se ajusta al número de
+        columnas del encabezado.
+        """
+        if len(table_lines) < 3:
+            return None
+        
         # Header
-        header_parts = [cell.strip() for cell in table_lines[0].split('|') if cell.strip()]
+        header_parts = _split_row(table_lines[0])
         num_cols = len(header_parts)
         
-        if num_cols == 0:
-            return '\n'.join(table_lines)
+        if not any(header_parts):
+            return None
         
         # Data rows (skip separator)
+        body_lines = table_lines[1:]
+        if TABLE_SEPARATOR_PATTERN.match(body_lines[0]):
+            body_lines = body_lines[1:]
+        
         data_rows = []
-        for line in table_lines[2:]:
-            parts = [cell.strip() for cell in line.split('|') if cell.strip()]
-            if parts:
-                # Ajustar columnas
-                while len(parts) < num_cols:
-                    parts.append('')
-                data_rows.append(parts[:num_cols])
+        for line in body_lines:
+            parts = _split_row(line)
+            # Ajustar columnas
+            if len(parts) < num_cols:
+                parts.extend([''] * (num_cols - len(parts)))
+            elif len(parts) > num_cols:
+                del parts[num_cols:]
+            data_rows.append(parts)
         
         if not data_rows:
-            return '\n'.join(table_lines)
-        
-        # Determinar especificación de columnas
-        if num_cols <= 3:
-            col_spec = '|' + 'c|' * num_cols
-        else:
-            col_spec = '|' + 'l|' * num_cols
+            return None
         
-        # Procesar título si existe
+        return header_parts, data_rows
+    
+    def table_caption(self, table_title: Optional[str]) -> str:
+        """Texto del caption a partir de la línea **Table N: ...** (o el valor por defecto)"""
         caption_text = "Technical Specifications"  # Default
         if table_title:
             # Extraer el texto del título, removiendo **Table X:** o **Tabla X:**
-            import re
-            title_match = re.search(r'\*\*(?:Table|Tabla)\s+\d+:\s*([^*]+)\*\*', table_title)
+            title_match = TABLE_TITLE_PATTERN.search(table_title)
             if title_match:
                 caption_text = title_match.group(1).strip()
+        return caption_text
+    
+    def format_table(self, header_parts: List[str], data_rows: List[List[str]], caption_text: str) -> str:
+        """Genera el entorno table de LaTeX para celdas ya convertidas
         
-        # Generar LaTeX
-        latex = f'''
-\\begin{{table}}[H]
-\\centering
-\\small
-\\begin{{tabular}}{{{col_spec}}}
-\\hline
-'''
+        Las tablas con más de longtable_rows filas se emiten como longtable,
+        que repite el encabezado y puede partirse entre páginas.
+        """
+        num_cols = len(header_parts)
         
-        # Header
-        latex += ' & '.join(header_parts) + ' \\\\\n\\hline\n'
+        # Determinar especificación de columnas
+        if num_cols <= 3:
+            col_spec = '|' + 'c|' * num_cols
+        else:
+            col_spec = '|' + 'l|' * num_cols
         
-        # Data rows
-        for row in data_rows:
-            latex += ' & '.join(row) + ' \\\\\n'
+        header = ' & '.join(header_parts) + ' \\\\'
+        rows = [' & '.join(row) + ' \\\\' for row in data_rows]
         
-        latex += f'''\\hline
-\\end{{tabular}}
-\\caption{{{caption_text}}}
-\\end{{table}}
-
-'''
+        if len(data_rows) > self.longtable_rows:
+            parts = [
+                '',
+                '\\begingroup',
+                '\\small',
+                f'\\begin{{longtable}}{{{col_spec}}}',
+                f'\\caption{{{caption_text}}} \\\\',
+                '\\hline', header, '\\hline',
+                '\\endfirsthead',
+                '\\hline', header, '\\hline',
+                '\\endhead',
+                '\\hline',
+                '\\endfoot',
+                *rows,
+                '\\end{longtable}',
+                '\\endgroup',
+                '',
+                '',
+            ]
+        else:
+            parts = [
+                '',
+                '\\begin{table}[H]',
+                '\\centering',
+                '\\small',
+                f'\\begin{{tabular}}{{{col_spec}}}',
+                '\\hline', header, '\\hline',
+                *rows,
+                '\\hline',
+                '\\end{tabular}',
+                f'\\caption{{{caption_text}}}',
+                '\\end{table}',
+                '',
+                '',
+            ]
         
-        return latex
+        return '\n'.join(parts)
     
     def process_lists(self, content: str) -> str:
         """Procesa listas"""
@@ -338,80 +1647,20 @@ class LatexDocGenerator:
         return '\n'.join(result)
     
     def escape_latex_chars(self, text: str) -> str:
-        """Escapa caracteres especiales y emojis"""
-        lines = text.split('\n')
+        """Escapa caracteres especiales y emojis de un texto LaTeX ya convertido
+        
+        Las líneas de estructura LaTeX (entornos, comandos al inicio de línea y
+        filas de tabla dentro de un entorno) solo reciben la sustitución de
+        símbolos. En el resto se escapan únicamente los segmentos de texto: las
+        fórmulas $...$, los comandos, los caracteres ya escapados y los
+        argumentos literales (URLs, rutas, etiquetas) pasan sin cambios.
+        """
         result = []
         in_latex_env = False
         
-        # Replace emojis with text equivalents first
-        emoji_replacements = {
-            '⚙️': 'Technical Specifications',
-            '🔌': 'Pinout',
-            '📏': 'Dimensions', 
-            '📃': 'Topology',
-            '🚀': '',
-            '✅': '',
-            '❌': '',
-            '📊': '',
-            '🧪': '',
-            '📄': '',
-            '📚': '',
-            '🎯': '',
-            '⚡': '',
-            '🔧': '',
-            '📦': '',
-            '🌐': '',
-            '💡': '',
-            '🔥': '',
-            '⭐': '',
-            '🎉': '',
-        }
-        
-        for emoji, replacement in emoji_replacements.items():
-            text = text.replace(emoji, replacement)
-        
-        # Handle special Unicode characters
-        special_chars = {
-            'Ω': r'$\Omega$',
-            '°': r'\degree',
-            '±': r'$\pm$',
-            'µ': r'$\mu$',
-            '≤': r'$\leq$',
-            '≥': r'$\geq$',
-            '×': r'$\times$',
-            '÷': r'$\div$',
-            '√': r'$\sqrt{}$',
-            '∞': r'$\infty$',
-            'α': r'$\alpha$',
-            'β': r'$\beta$',
-            'γ': r'$\gamma$',
-            'δ': r'$\delta$',
-            'ε': r'$\varepsilon$',
-            'θ': r'$\theta$',
-            'λ': r'$\lambda$',
-            'π': r'$\pi$',
-            'σ': r'$\sigma$',
-            'τ': r'$\tau$',
-            'φ': r'$\phi$',
-            'ω': r'$\omega$',
-            '≥': r'$\geq$',
-            '×': r'$\times$',
-            '÷': r'$\div$',
-            '²': r'$^2$',
-            '³': r'$^3$',
-            '½': r'$\frac{1}{2}$',
-            '¼': r'$\frac{1}{4}$',
-            '¾': r'$\frac{3}{4}$',
-        }
-        
-        for char, replacement in special_chars.items():
-            text = text.replace(char, replacement)
-        
-        lines = text.split('\n')
-        
-        for line in lines:
+        for line in replace_all(text, SYMBOL_REPLACEMENTS).split('\n'):
             # Detectar entornos LaTeX
-            if ('\\begin{' in line or '\\end{' in line or 
+            if ('\\begin{' in line or '\\end{' in line or
                 line.strip().startswith('\\') or
                 '\\includegraphics' in line):
                 in_latex_env = True
@@ -421,93 +1670,27 @@ class LatexDocGenerator:
             if in_latex_env and (line.strip() == '' or '&' in line):
                 result.append(line)
                 continue
-            else:
-                in_latex_env = False
-            
-            # Escapar caracteres especiales solo en texto normal
-            escape_chars = {
-                '%': '\\%',
-                '$': '\\$',
-                '#': '\\#',
-                '^': '\\textasciicircum{}',
-                '_': '\\_',
-                '~': '\\textasciitilde{}',
-            }
-            
-            # Don't escape & in table environments
-            if not ('|' in line and line.count('|') >= 2):
-                escape_chars['&'] = '\\&'
-            
-            for char, replacement in escape_chars.items():
-                # Don't escape if already escaped or in math mode
-                if char not in ['$']:  # Don't double-escape math mode
-                    line = re.sub(f'(?<!\\\\){re.escape(char)}(?![^$]*\\$)', replacement, line)
+            in_latex_env = False
             
-            result.append(line)
+            # Don't escape & in table rows
+            translation = (TABLE_ROW_TRANSLATION if line.count('|') >= 2
+                           else TEXT_TRANSLATION)
+            segments = LATEX_SEGMENT_PATTERN.split(line)
+            # split con un grupo alterna texto (pares) y segmentos LaTeX (impares)
+            for index in range(0, len(segments), 2):
+                segments[index] = segments[index].translate(translation)
+            result.append(''.join(segments))
         
         return '\n'.join(result)
     
     def process_template(self, template: str, metadata: Dict) -> str:
-        """Procesa template con soporte completo para condicionales Pandoc"""
-        
-        # Función para procesar condicionales de forma recursiva
-        def process_conditionals(text):
-            # Patrón para encontrar condicionales completos (incluyendo else opcional)
-            pattern = r'\$if\(([^)]+)\)\$(.*?)(?:\$else\$(.*?))?\$endif\$'
-            
-            def replace_conditional(match):
-                var_name = match.group(1)
-                if_content = match.group(2) or ""
-                else_content = match.group(3) or ""
-                
-                # Decidir qué contenido usar
-                if var_name in metadata and metadata[var_name]:
-                    result = if_content
-                else:
-                    result = else_content
-                
-                # Procesar condicionales anidados en el resultado
-                return process_conditionals(result)
-            
-            # Mientras haya condicionales, seguir procesando
-            while re.search(pattern, text, re.DOTALL):
-                text = re.sub(pattern, replace_conditional, text, flags=re.DOTALL)
-            
-            return text
-        
-        # Procesar condicionales
-        template = process_conditionals(template)
+        """Procesa template con soporte completo para condicionales Pandoc
         
-        # Función para obtener valor anidado de un diccionario
-        def get_nested_value(data, key_path):
-            """Obtiene valor anidado usando notación de punto"""
-            keys = key_path.split('.')
-            value = data
-            try:
-                for key in keys:
-                    if isinstance(value, dict) and key in value:
-                        value = value[key]
-                    else:
-                        return None
-                return value
-            except:
-                return None
-        
-        # Reemplazar variables anidadas primero (ej: hardware_license.type)
-        nested_pattern = r'\$([a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_.]*)\$'
-        def replace_nested(match):
-            key_path = match.group(1)
-            value = get_nested_value(metadata, key_path)
-            return str(value) if value is not None else f"${key_path}$"
-        
-        template = re.sub(nested_pattern, replace_nested, template)
-        
-        # Reemplazar variables simples
-        for key, value in metadata.items():
-            if value is not None:
-                template = template.replace(f'${key}$', str(value))
-        
-        # Limpiar variables no definidas (reemplazar con valores por defecto)
+        El template se compila una vez (por hash de su contenido) en un plan de
+        renderizado y cada documento se genera en una sola pasada.
+        """
+        from datetime import datetime
+        # Valores por defecto para variables no definidas
         default_values = {
             'title': 'Hardware Module Documentation',
             'partnumber': 'HW-XXXXX-001',
@@ -517,165 +1700,1595 @@ class LatexDocGenerator:
             'organization': 'UNIT Electronics'
         }
         
-        for var, default in default_values.items():
-            template = template.replace(f'${var}$', default)
-        
-        return template
-        default_values = {
-            'title': 'Hardware Documentation',
-            'subtitle': 'Technical Specifications',
-            'author': 'Engineering Team',
-            'date': '2025-07-21',
-            'version': 'Rev. 1.0',
-            'organization': 'DevLab Electronics',
-            'partnumber': 'HW-001',
-            'classification': 'Public Technical Document',
-            'standards': 'IEEE Std 1149.1, IPC-2221'
-        }
-        
-        for key, default_value in default_values.items():
-            template = template.replace(f'${key}$', default_value)
-        
-        # Limpiar cualquier variable restante no procesada
-        template = re.sub(r'\$[a-zA-Z_][a-zA-Z0-9_]*\$', '', template)
-        
-        return template
+        with _stage('template.render'):
+            return compile_template(template).render(metadata, default_values)
     
-    def generate_document(self, lang_dir: str) -> str:
-        """Genera documento completo"""
+    def parse_document(self, lang_dir: str) -> ParsedDocument:
+        """Lee metadatos y contenido de un idioma y analiza el Markdown"""
         # Cargar metadatos
-        metadata = self.load_metadata(lang_dir)
+        with _stage('metadata'):
+            metadata = self.load_metadata(lang_dir)
         
         # Leer contenido
         content_file = self.base_dir / lang_dir / "content.md"
         with open(content_file, 'r', encoding='utf-8') as f:
             markdown_content = f.read()
+        _count_bytes('content', len(markdown_content.encode('utf-8')))
         
-        # Convertir a LaTeX
-        latex_content = self.process_markdown(markdown_content, lang_dir)
-        metadata['body'] = latex_content
+        with _stage('markdown.parse'):
+            blocks = parse_markdown(markdown_content, split_table=self.split_table)
+        return ParsedDocument(lang_dir, metadata, markdown_content, blocks)
+    
+    def generate_document(self, lang_dir: str) -> str:
+        """Genera documento completo"""
+        document = self.parse_document(lang_dir)
+        if self.validate:
+            self.validation[lang_dir] = self.validate_document(document)
         
         # Procesar template
         with open(self.template_file, 'r', encoding='utf-8') as f:
             template = f.read()
         
-        return self.process_template(template, metadata)
+        return self.render_document(document.content, document.metadata, template,
+                                    lang_dir, blocks=document.blocks)
+    
+    def standards(self) -> Dict:
+        """document_standards.yaml, cargado una vez por generador"""
+        if self._standards is None:
+            self._standards = self.yaml_cache.load(self.standards_file) or {}
+        return self._standards
     
-    def compile_pdf(self, tex_file: Path) -> bool:
-        """Compila PDF"""
+    def validate_document(self, document: ParsedDocument) -> Dict:
+        """Valida un documento ya analizado con los validadores de estándares"""
+        # Solo hace falta en --validate
+        validate_standards = _import_validators()
+        with _stage('validate'):
+            return validate_standards.validate_parsed(document.lang, document.metadata,
+                                                      document.content, document.headings,
+                                                      self.standards())
+    
+    def render_document(self, content: str, metadata: Dict, template: str, lang_dir: str = "",
+                        blocks: Optional[List[MarkdownBlock]] = None) -> str:
+        """Convierte el Markdown y lo inserta en el template como $body$"""
+        context = dict(metadata)
+        body_map: List[Tuple[int, int]] = []
+        context['body'] = self.process_markdown(content, lang_dir, body_map, blocks)
+        if self.draft:
+            # graphicx en modo draft dibuja un marco con el nombre en lugar de la imagen
+            context['body'] = '\\setkeys{Gin}{draft}\n' + context['body']
+            body_map = [(tex_line + 1, md_line) for tex_line, md_line in body_map]
+        document = self.process_template(template, context)
+        
+        # Desplazar el mapa a la posición de $body$ en el documento final
+        position = document.find(context['body'])
+        if position >= 0:
+            offset = document.count('\n', 0, position)
+            self.source_maps[lang_dir] = [(tex_line + offset, md_line)
+                                          for tex_line, md_line in body_map]
+        return document
+    
+    def compile_pdf(self, tex_file: Path, source_map: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """Compila PDF
+        
+        La salida de cada pasada se analiza mientras se produce; un error fatal
+        (o cualquier error, con halt_on_error) detiene la pasada y la
+        compilación. source_map traduce las líneas del .tex a content.md en
+        los diagnósticos.
+        """
         try:
-            original_dir = os.getcwd()
-            os.chdir(self.docs_dir)
+            with _stage('pdflatex.format'):
+                format_file = self.ensure_format(tex_file)
+            passes = self._compile_passes(tex_file, source_map, format_file)
+            step = next(passes)
+            while True:
+                self._run_pdflatex(*step)
+                step = passes.send(None)
+        except StopIteration as done:
+            return done.value
+        except Exception as e:
+            logger.error(f"Error compilación: {e}")
+            return False
+    
+    async def compile_pdf_async(self, tex_file: Path,
+                                source_map: Optional[List[Tuple[int, int]]] = None,
+                                semaphore: Optional[AsyncContextManager] = None) -> bool:
+        """Igual que compile_pdf, con cada pasada como subproceso asyncio
+        
+        semaphore limita los pdflatex simultáneos de todas las tareas; se toma
+        solo mientras dura cada pasada, no entre pasadas.
+        """
+        import asyncio
+        try:
+            with _stage('pdflatex.format'):
+                format_file = await asyncio.to_thread(self.ensure_format, tex_file)
+            passes = self._compile_passes(tex_file, source_map, format_file)
+            step = next(passes)
+            while True:
+                await self._run_pdflatex_async(*step, semaphore=semaphore)
+                step = passes.send(None)
+        except StopIteration as done:
+            return done.value
+        except Exception as e:
+            logger.error(f"Error compilación: {e}")
+            return False
+    
+    def _compile_passes(self, tex_file: Path, source_map: Optional[List[Tuple[int, int]]],
+                        format_file: Optional[Path]):
+        """Lógica de pasadas común a compile_pdf y compile_pdf_async
+        
+        Generador que produce (comando, parser) para cada pasada, espera a que
+        el llamador la ejecute y devuelve (StopIteration.value) si hay PDF.
+        """
+        # pdflatex se ejecuta con cwd=docs_dir en lugar de os.chdir, que es
+        # global al proceso y no es seguro con varios trabajos concurrentes
+        tex_filename = tex_file.name
+        pdf_path = self.docs_dir / tex_filename.replace('.tex', '.pdf')
+        
+        # Recompilar solo mientras el log pida otra pasada o cambien los
+        # archivos auxiliares (referencias cruzadas, índice, listas)
+        command = ['pdflatex', '-interaction=nonstopmode', '-file-line-error']
+        if format_file:
+            command.append(f'-fmt={format_file.resolve()}')
+        command.append(tex_filename)
+        
+        aux_state = self._aux_state(tex_file)
+        # En borrador, si no hay .aux de una compilación anterior se hace
+        # antes una pasada -draftmode (sin PDF) que solo escribe los auxiliares
+        draft_first = self.draft and aux_state['.aux'] is None
+        passes = max(self.max_passes, 2) if draft_first else self.max_passes
+        for pass_number in range(1, passes + 1):
+            intermediate = draft_first and pass_number == 1
+            pass_start = time.perf_counter()
+            parser = PdflatexLogParser(source_map)
+            yield ([command[0], '-draftmode', *command[1:]] if intermediate else command), parser
+            report = _current_report()
+            if report is not None:
+                report.passes.append({'pass': pass_number, 'draftmode': intermediate,
+                                      'seconds': round(time.perf_counter() - pass_start, 6)})
             
-            # Crear paths relativos al directorio docs
-            tex_filename = tex_file.name
-            pdf_filename = tex_filename.replace('.tex', '.pdf')
+            if parser.fatal or (self.halt_on_error and parser.errors):
+                self._log_diagnostics(parser)
+                logger.error(f"❌ pdflatex detenido en la pasada {pass_number}")
+                return False
             
-            # Compilar 3 veces para referencias cruzadas
-            for i in range(3):
-                result = subprocess.run(
-                    ['pdflatex', '-interaction=nonstopmode', tex_filename],
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    errors='replace'
-                )
-                
-                if "Fatal error" in result.stdout:
-                    print(f"Error fatal: {result.stdout[-800:]}")
-                    return False
+            if intermediate:
+                aux_state = self._aux_state(tex_file)
+                continue
+            # En borrador no se persigue que las referencias se estabilicen:
+            # los auxiliares se conservan y convergen en las siguientes compilaciones
+            if self.draft:
+                break
             
-            # Verificar PDF - usando path relativo al directorio docs
-            pdf_path = Path(pdf_filename)
-            if pdf_path.exists():
-                size = pdf_path.stat().st_size
-                if size > 1000:
-                    # Limpiar archivos auxiliares opcionales
-                    for ext in ['.aux', '.out', '.toc', '.lof', '.lot']:
-                        aux_file = Path(tex_filename.replace('.tex', ext))
+            new_aux_state = self._aux_state(tex_file)
+            log_file = self.docs_dir / tex_file.with_suffix('.log').name
+            if log_file.exists():
+                log_text = log_file.read_text(encoding='utf-8', errors='replace')
+                rerun_requested = RERUN_PATTERN.search(log_text) is not None
+            else:
+                rerun_requested = parser.rerun_requested
+            if not rerun_requested and new_aux_state == aux_state:
+                break
+            aux_state = new_aux_state
+        
+        logger.info(f"🔁 pdflatex: {pass_number} pasada(s)")
+        self._log_diagnostics(parser)
+        
+        # Verificar PDF
+        if pdf_path.exists():
+            size = pdf_path.stat().st_size
+            if size > 1000:
+                _count_bytes('pdf', size)
+                # Limpiar archivos auxiliares opcionales (en borrador se
+                # conservan para la siguiente compilación)
+                with _stage('cleanup'):
+                    for ext in AUX_EXTENSIONS if not self.draft else ():
+                        aux_file = self.docs_dir / tex_filename.replace('.tex', ext)
                         if aux_file.exists():
                             try:
                                 aux_file.unlink()
                             except:
                                 pass  # No es crítico si no se pueden eliminar
-                    return True
-                else:
-                    print(f"❌ PDF demasiado pequeño: {size} bytes")
-                    return False
+                return True
             else:
-                print(f"❌ PDF no generado")
+                logger.error(f"❌ PDF demasiado pequeño: {size} bytes")
+                return False
+        else:
+            logger.error(f"❌ PDF no generado")
+            return False
+    
+    def readable_input_hashes(self, lang: str) -> Optional[Dict[str, str]]:
+        """compute_input_hashes, o None tras informar del error si el idioma no se puede leer"""
+        try:
+            return self.compute_input_hashes(lang)
+        except Exception as e:
+            logger.error(f"❌ Error procesando {lang}: {e}")
+            return None
+    
+    def compute_input_hashes(self, lang: str) -> Dict[str, str]:
+        """Hash de contenido de cada entrada que influye en el documento de un idioma"""
+        lang_path = self.base_dir / lang
+        inputs = {
+            f"{lang}/content.md": lang_path / "content.md",
+            f"{lang}/metadata.yaml": lang_path / "metadata.yaml",
+            "template.tex": self.template_file,
+            # Un cambio en el generador también invalida la salida
+            "<generator>": Path(__file__),
+        }
+        
+        # Imágenes referenciadas, resueltas igual que en process_images
+        for image_path, source_path in self.referenced_images(lang).items():
+            inputs[f"image:{image_path}"] = source_path
+        # Logos que la plantilla carga con $logo$ o por su nombre fijo
+        for logo, source_path in self.logo_files(lang).items():
+            inputs[f"logo:{logo}"] = source_path
+        
+        hashes = {
+            key: self.file_digest(path) if path is not None and path.exists() else "missing"
+            for key, path in inputs.items()
+        }
+        # Opciones que cambian el documento generado
+        options = []
+        if self.optimize_images:
+            options.append(f"optimize:{self.image_dpi}dpi:q{self.jpeg_quality}")
+        if self.longtable_rows != DEFAULT_LONGTABLE_ROWS:
+            options.append(f"longtable:{self.longtable_rows}")
+        if self.draft:
+            options.append("draft")
+        if self.sections:
+            options.append("sections:" + ",".join(self.sections))
+        if options:
+            hashes["<options>"] = ":".join(options)
+        return hashes
+    
+    def referenced_images(self, lang: str) -> Dict[str, Optional[Path]]:
+        """Imágenes de content.md de un idioma y el archivo al que resuelven
+        
+        El resultado queda en self.image_dependencies, el grafo que usa --watch
+        para recompilar solo los idiomas que usan una imagen modificada.
+        """
+        content = (self.base_dir / lang / "content.md").read_text(encoding='utf-8')
+        images = {}
+        for match in IMAGE_PATTERN.finditer(content):
+            image_path = match.group(2)
+            dest_filename, source_path = self.resolve_image(image_path, lang)
+            if source_path is None and dest_filename:
+                source_path = self.docs_dir / dest_filename
+            images[image_path] = source_path
+        self.image_dependencies[lang] = images
+        return images
+    
+    def load_build_manifest(self) -> Dict:
+        """Carga docs/.build-cache.json (vacío si no existe o es de otra versión)"""
+        try:
+            with open(self.build_manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {'version': BUILD_MANIFEST_VERSION, 'languages': {}}
+        if manifest.get('version') != BUILD_MANIFEST_VERSION:
+            return {'version': BUILD_MANIFEST_VERSION, 'languages': {}}
+        return manifest
+    
+    def record_build(self, lang: str, inputs: Dict[str, str]):
+        """Registra en el manifiesto las entradas de una compilación correcta"""
+        with _MANIFEST_LOCK:
+            manifest = self.load_build_manifest()
+            manifest['languages'][lang] = {'inputs': inputs}
+            tmp_file = self.build_manifest_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, self.build_manifest_file)
+    
+    def is_up_to_date(self, lang: str, inputs: Dict[str, str]) -> bool:
+        """Indica si las salidas de un idioma existen y sus entradas no cambiaron"""
+        for ext in ('.tex', '.pdf'):
+            if not (self.docs_dir / f"datasheet_{lang}{ext}").exists():
                 return False
+        entry = self.load_build_manifest()['languages'].get(lang)
+        return entry is not None and entry.get('inputs') == inputs
+    
+    def _run_pdflatex(self, command: List[str], parser: PdflatexLogParser) -> int:
+        """Ejecuta una pasada leyendo su salida línea a línea
+        
+        La pasada se mata en cuanto el parser ve un error fatal (o, con
+        halt_on_error, cualquier error ya ubicado en una línea) en lugar de
+        esperar a que pdflatex termine.
+        """
+        import subprocess
+        # Sin cortes de línea a 79 columnas, para poder analizar cada mensaje
+        env = dict(os.environ, max_print_line='10000')
+        with subprocess.Popen(command, cwd=self.docs_dir, env=env,
+                              stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True,
+                              encoding='utf-8', errors='replace') as process:
+            for line in process.stdout:
+                parser.feed(line)
+                if parser.fatal or (self.halt_on_error and parser.errors and not parser.pending):
+                    process.kill()
+                    break
+        return process.returncode
+    
+    async def _run_pdflatex_async(self, command: List[str], parser: PdflatexLogParser,
+                                  semaphore: Optional[AsyncContextManager] = None) -> int:
+        """Versión asyncio de _run_pdflatex; cancelar la tarea mata el proceso"""
+        import asyncio
+        env = dict(os.environ, max_print_line='10000')
+        async with semaphore or nullcontext():
+            process = await asyncio.create_subprocess_exec(
+                *command, cwd=self.docs_dir, env=env, limit=1 << 20,
+                stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT)
+            try:
+                async for raw_line in process.stdout:
+                    parser.feed(raw_line.decode('utf-8', errors='replace'))
+                    if parser.fatal or (self.halt_on_error and parser.errors and not parser.pending):
+                        process.kill()
+                        break
+                return await process.wait()
+            except BaseException:
+                # Cancelación (timeout del trabajo) u otro error: no dejar pdflatex vivo
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+    
+    def _log_diagnostics(self, parser: PdflatexLogParser):
+        """Muestra los diagnósticos de una pasada y los guarda en el informe"""
+        shown = [d for d in parser.diagnostics if d.kind != 'rerun']
+        report = _current_report()
+        if report is not None:
+            report.diagnostics = [asdict(d) for d in shown]
+        
+        for diagnostic in shown[:MAX_REPORTED_DIAGNOSTICS]:
+            if diagnostic.kind in ('error', 'fatal', 'missing_figure'):
+                logger.error(f"   ❌ {diagnostic.describe()}")
+            else:
+                logger.warning(f"   ⚠️  {diagnostic.describe()}")
+        if len(shown) > MAX_REPORTED_DIAGNOSTICS:
+            logger.warning(f"   ... y {len(shown) - MAX_REPORTED_DIAGNOSTICS} diagnóstico(s) más")
+    
+    def preamble_format_name(self) -> Optional[str]:
+        """Nombre del formato del preámbulo fijo de template.tex, o None si no hay"""
+        try:
+            template = self.template_file.read_text(encoding='utf-8')
+        except OSError:
+            return None
+        
+        end = template.find(FORMAT_DUMP_MARKER)
+        if end < 0:
+            end = template.find('\\begin{document}')
+        if end < 0:
+            return None
+        
+        preamble = template[:end]
+        # Un preámbulo con variables depende del idioma y no se puede compartir
+        if TEMPLATE_VARIABLE_PATTERN.search(preamble):
+            return None
+        
+        # El formato depende también del pdflatex que lo vuelca
+        key = f"{preamble}\0{pdflatex_build_id()}"
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return f"preamble-{digest[:16]}"
+    
+    def ensure_format(self, tex_file: Path) -> Optional[Path]:
+        """Devuelve el formato precompilado del preámbulo, creándolo si falta
+        
+        El formato se vuelca con mylatexformat a partir del propio documento y
+        se reutiliza mientras no cambien el preámbulo de template.tex ni la
+        instalación de pdflatex. Si no se puede crear, se compila de la forma
+        normal.
+        """
+        import subprocess
+        name = self.preamble_format_name() if self.use_format else None
+        if not name:
+            return None
+        
+        format_file = self.format_dir / f"{name}.fmt"
+        _cache_event('format', format_file.exists())
+        if format_file.exists():
+            return format_file
+        
+        # Volcar con un jobname propio del proceso y mover al final, para que
+        # dos trabajos en paralelo no escriban el mismo archivo
+        jobname = f"{name}-{_writer_id()}"
+        result = subprocess.run(
+            ['pdflatex', '-ini', '-interaction=nonstopmode', f'-jobname={jobname}',
+             '&pdflatex', 'mylatexformat.ltx', tex_file.name],
+            cwd=self.docs_dir,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace'
+        )
+        
+        dumped = self.docs_dir / f"{jobname}.fmt"
+        (self.docs_dir / f"{jobname}.log").unlink(missing_ok=True)
+        if result.returncode != 0 or not dumped.exists():
+            dumped.unlink(missing_ok=True)
+            logger.warning("⚠️  No se pudo precompilar el preámbulo (¿falta mylatexformat?), "
+                           "se compila sin formato")
+            self.use_format = False
+            return None
+        
+        self.format_dir.mkdir(parents=True, exist_ok=True)
+        os.replace(dumped, format_file)
+        logger.info(f"✅ Preámbulo precompilado: {format_file.name}")
+        return format_file
+    
+    def _aux_state(self, tex_file: Path) -> Dict[str, Optional[str]]:
+        """Hash de los archivos auxiliares que determinan si hace falta otra pasada"""
+        state = {}
+        for ext in AUX_EXTENSIONS:
+            aux_file = self.docs_dir / tex_file.with_suffix(ext).name
+            state[ext] = _file_sha256(aux_file) if aux_file.exists() else None
+        return state
+    
+    def build_language(self, lang: str, force: bool = False, record: bool = True) -> bool:
+        """Genera el LaTeX y compila el PDF de un idioma
+        
+        Si ninguna entrada cambió desde la última compilación correcta se omite
+        (salvo con force). Con record=False el manifiesto no se escribe y las
+        entradas quedan en self.built_inputs para que las registre el llamador.
+        """
+        report = BuildReport(lang)
+        start = time.perf_counter()
+        with _reporting(report):
+            with _stage('inputs'):
+                inputs = self.readable_input_hashes(lang)
+            skipped = inputs is not None and not force and self.is_up_to_date(lang, inputs)
+            _cache_event('manifest', skipped)
+            if inputs is None:
+                ok = False
+            elif skipped:
+                # Sin cambios no se escribe nada en docs/
+                logger.info(f"⏭️  {lang} sin cambios, se omite la compilación")
+                if self.validate:
+                    self.validation[lang] = self.validate_document(self.parse_document(lang))
+                ok = True
+            else:
+                self.prepare_output_dirs()
+                ok = self._build_language(lang)
+                if ok:
+                    self.built_inputs[lang] = inputs
+                    if record:
+                        self.record_build(lang, inputs)
+        
+        self.reports[lang] = {'ok': ok, 'skipped': skipped,
+                              'seconds': round(time.perf_counter() - start, 6),
+                              **report.as_dict()}
+        return ok
+    
+    def _build_language(self, lang: str) -> bool:
+        """Genera el LaTeX y compila el PDF de un idioma sin consultar la caché"""
+        try:
+            # Generar LaTeX
+            latex_doc = self.generate_document(lang)
+            tex_file = self.docs_dir / f"datasheet_{lang}.tex"
+            
+            with _stage('tex.write'):
+                with open(tex_file, 'w', encoding='utf-8') as f:
+                    f.write(latex_doc)
+            _count_bytes('tex', len(latex_doc.encode('utf-8')))
+            
+            logger.info(f"✅ LaTeX generado: {tex_file}")
             
+            # Compilar PDF
+            with _stage('pdflatex'):
+                compiled = self.compile_pdf(tex_file, self.source_maps.get(lang))
+            if compiled:
+                pdf_file = tex_file.with_suffix('.pdf')
+                size_kb = pdf_file.stat().st_size // 1024
+                logger.info(f"✅ PDF generado: {pdf_file} ({size_kb} KB)")
+                return True
+            
+            logger.error(f"❌ Error compilando PDF para {lang}")
+            return False
+                
         except Exception as e:
-            print(f"Error compilación: {e}")
+            logger.error(f"❌ Error procesando {lang}: {e}")
             return False
+    
+    async def build_language_async(self, lang: str, semaphore: Optional[AsyncContextManager] = None,
+                                   force: bool = False) -> bool:
+        """Versión asyncio de build_language
+        
+        La conversión a LaTeX corre en un hilo y las pasadas de pdflatex como
+        subprocesos, de modo que la conversión de otros idiomas avanza
+        mientras TeX compila. Si la tarea se cancela el informe queda como fallo.
+        """
+        import asyncio
+        report = BuildReport(lang)
+        start = time.perf_counter()
+        ok = skipped = False
+        try:
+            with _reporting(report):
+                with _stage('inputs'):
+                    inputs = await asyncio.to_thread(self.readable_input_hashes, lang)
+                skipped = inputs is not None and not force and self.is_up_to_date(lang, inputs)
+                _cache_event('manifest', skipped)
+                if inputs is None:
+                    ok = False
+                elif skipped:
+                    logger.info(f"⏭️  {lang} sin cambios, se omite la compilación")
+                    if self.validate:
+                        document = await asyncio.to_thread(self.parse_document, lang)
+                        self.validation[lang] = self.validate_document(document)
+                    ok = True
+                else:
+                    self.prepare_output_dirs()
+                    ok = await self._build_language_async(lang, semaphore)
+                    if ok:
+                        self.built_inputs[lang] = inputs
+                        self.record_build(lang, inputs)
         finally:
-            os.chdir(original_dir)
+            self.reports[lang] = {'ok': ok, 'skipped': skipped,
+                                  'seconds': round(time.perf_counter() - start, 6),
+                                  **report.as_dict()}
+        return ok
+    
+    async def _build_language_async(self, lang: str, semaphore: Optional[AsyncContextManager]) -> bool:
+        """Como _build_language, compilando con compile_pdf_async"""
+        import asyncio
+        try:
+            latex_doc = await asyncio.to_thread(self.generate_document, lang)
+            tex_file = self.docs_dir / f"datasheet_{lang}.tex"
+            
+            with _stage('tex.write'):
+                with open(tex_file, 'w', encoding='utf-8') as f:
+                    f.write(latex_doc)
+            _count_bytes('tex', len(latex_doc.encode('utf-8')))
+            
+            logger.info(f"✅ LaTeX generado: {tex_file}")
+            
+            with _stage('pdflatex'):
+                compiled = await self.compile_pdf_async(tex_file, self.source_maps.get(lang),
+                                                        semaphore)
+            if compiled:
+                pdf_file = tex_file.with_suffix('.pdf')
+                size_kb = pdf_file.stat().st_size // 1024
+                logger.info(f"✅ PDF generado: {pdf_file} ({size_kb} KB)")
+                return True
+            
+            logger.error(f"❌ Error compilando PDF para {lang}")
+            return False
+                
+        except Exception as e:
+            logger.error(f"❌ Error procesando {lang}: {e}")
+            return False
+    
+    async def generate_all_async(self, force: bool = False, timeout: Optional[float] = None,
+                                 tex_jobs: int = 0, langs: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Genera los idiomas como tareas asyncio concurrentes
+        
+        Un semáforo común limita los pdflatex simultáneos (tex_jobs, o si es 0
+        lo que permiten CPUs y memoria). timeout, en segundos, se aplica a
+        cada idioma: al agotarse se cancela su tarea y se mata su pdflatex.
+        """
+        import asyncio
+        langs = langs or self.find_language_dirs()
+        
+        if not langs:
+            logger.warning("No se encontraron idiomas válidos")
+            return {}
+        
+        self.build_image_indexes()
+        limit = tex_jobs if tex_jobs > 0 else tex_concurrency_limit()
+        semaphore = asyncio.Semaphore(limit)
+        logger.info(f"Procesando idiomas: {', '.join(langs)}")
+        logger.info(f"⚙️  Compilación asyncio: hasta {limit} pdflatex simultáneo(s)")
+        
+        async def build(lang: str) -> bool:
+            try:
+                return await asyncio.wait_for(
+                    self.build_language_async(lang, semaphore, force=force), timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"❌ {lang}: tiempo agotado ({timeout:g} s), compilación cancelada")
+                return False
+        
+        results = await asyncio.gather(*(build(lang) for lang in langs))
+        return dict(zip(langs, results))
+    
+    def write_build_report(self, metrics_file: Optional[str] = None) -> Optional[Path]:
+        """Escribe docs/build-report.json con los informes de esta ejecución
+        
+        Con metrics_file escribe además las mismas medidas como textfile de
+        Prometheus (node_exporter). Si todos los idiomas se omitieron, docs/
+        queda intacto: el informe sigue siendo el de la última compilación real.
+        """
+        if not self.reports:
+            return None
+        
+        languages = dict(sorted(self.reports.items()))
+        if metrics_file:
+            write_prometheus_textfile(metrics_file, {(str(self.base_dir), lang): entry
+                                                     for lang, entry in languages.items()})
+        if all(entry['skipped'] for entry in languages.values()):
+            return None
+        
+        from datetime import datetime
+        cache: Dict[str, Dict] = {}
+        byte_totals: Dict[str, int] = {}
+        for entry in languages.values():
+            for name, counters in entry['cache'].items():
+                total = cache.setdefault(name, {'hits': 0, 'misses': 0})
+                total['hits'] += counters['hits']
+                total['misses'] += counters['misses']
+            for name, size in entry['bytes'].items():
+                byte_totals[name] = byte_totals.get(name, 0) + size
+        for counters in cache.values():
+            lookups = counters['hits'] + counters['misses']
+            counters['hit_rate'] = round(counters['hits'] / lookups, 3) if lookups else None
+        
+        report = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'product': str(self.base_dir),
+            'totals': {
+                'seconds': round(sum(entry['seconds'] for entry in languages.values()), 6),
+                'built': sum(1 for entry in languages.values() if not entry['skipped']),
+                'skipped': sum(1 for entry in languages.values() if entry['skipped']),
+                'failed': sum(1 for entry in languages.values() if not entry['ok']),
+                'bytes': dict(sorted(byte_totals.items())),
+                'cache': dict(sorted(cache.items())),
+            },
+            'languages': languages,
+        }
+        
+        report_file = self.docs_dir / "build-report.json"
+        _write_atomic(report_file, json.dumps(report, indent=2, ensure_ascii=False))
+        return report_file
     
-    def generate_all(self):
+    def write_validation_report(self) -> bool:
+        """Muestra la validación de esta ejecución y la escribe en docs/validation-report.json
+        
+        Devuelve True si todos los idiomas validados cumplen los estándares.
+        """
+        from datetime import datetime
+        validate_standards = _import_validators()
+        standards = self.standards()
+        languages = dict(sorted(self.validation.items()))
+        for result in languages.values():
+            validate_standards.print_validation(result, standards)
+        
+        valid = all(result['valid'] for result in languages.values())
+        report = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'product': str(self.base_dir),
+            'standards': str(self.standards_file),
+            'valid': valid,
+            'languages': languages,
+        }
+        report_file = self.docs_dir / "validation-report.json"
+        _write_atomic(report_file, json.dumps(report, indent=2, ensure_ascii=False))
+        logger.info(f"🎯 Validación: {'✅ todos los documentos cumplen' if valid else '❌ hay documentos no conformes'} "
+                    f"({report_file})")
+        return valid
+    
+    def generate_all(self, jobs: int = 1, force: bool = False) -> Dict[str, bool]:
         """Genera todos los documentos"""
         langs = self.find_language_dirs()
         
         if not langs:
-            print("No se encontraron idiomas válidos")
-            return
+            logger.warning("No se encontraron idiomas válidos")
+            return {}
+        
+        logger.info(f"Procesando idiomas: {', '.join(langs)}")
         
-        print(f"Procesando idiomas: {', '.join(langs)}")
+        if jobs == 1 or len(langs) == 1:
+            results = {}
+            for lang in langs:
+                logger.info(f"\n📝 Procesando {lang}...")
+                results[lang] = self.build_language(lang, force=force)
+            return results
         
+        return self.generate_parallel(langs, jobs, force=force)
+    
+    def generate_parallel(self, langs: List[str], jobs: int, force: bool = False) -> Dict[str, bool]:
+        """Genera varios idiomas en un pool de procesos con un log por trabajo
+        
+        Los idiomas al día se resuelven en este proceso; si no queda ninguno
+        por compilar no se arranca el pool.
+        """
+        results = {}
+        pending = []
         for lang in langs:
-            print(f"\n📝 Procesando {lang}...")
-            
+            # Los idiomas al día, o que no se pueden leer, se resuelven (y
+            # notifican) en este proceso
             try:
-                # Generar LaTeX
-                latex_doc = self.generate_document(lang)
-                tex_file = self.docs_dir / f"datasheet_{lang}.tex"
-                
-                with open(tex_file, 'w', encoding='utf-8') as f:
-                    f.write(latex_doc)
-                
-                print(f"✅ LaTeX generado: {tex_file}")
-                
-                # Compilar PDF
-                if self.compile_pdf(tex_file):
-                    pdf_file = tex_file.with_suffix('.pdf')
-                    size_kb = pdf_file.stat().st_size // 1024
-                    print(f"✅ PDF generado: {pdf_file} ({size_kb} KB)")
-                else:
-                    print(f"❌ Error compilando PDF para {lang}")
-                    
+                in_process = not force and self.is_up_to_date(lang, self.compute_input_hashes(lang))
+            except Exception:
+                in_process = True
+            if in_process:
+                results[lang] = self.build_language(lang)
+            else:
+                pending.append(lang)
+        if not pending:
+            return results
+        
+        self.prepare_output_dirs()
+        self.build_image_indexes()
+        summary = run_build_jobs([(self, lang) for lang in pending], jobs, force=force)
+        
+        # Resumen agregado
+        ok_count = sum(1 for job in summary if job['ok'])
+        logger.info(f"\n📊 Resumen: {ok_count}/{len(summary)} idioma(s) correctos")
+        for job in sorted(summary, key=lambda j: j['lang']):
+            if not job['ok']:
+                detail = job.get('error') or f"ver {job['log']}"
+                logger.error(f"   ❌ {job['lang']}: {detail}")
+        
+        results.update({job['lang']: job['ok'] for job in summary})
+        return results
+
+def run_build_jobs(tasks: List[Tuple[LatexDocGenerator, str]], jobs: int,
+                   force: bool = False) -> List[Dict]:
+    """Compila pares (generador, idioma) en un único pool de procesos
+    
+    Devuelve la descripción de cada trabajo (ver _build_language_job). Solo el
+    proceso principal escribe los manifiestos y reúne las dependencias.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    # jobs <= 0 significa "un trabajador por CPU"; nunca más que trabajos
+    max_workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+    max_workers = max(1, min(max_workers, len(tasks)))
+    logger.info(f"⚙️  Compilación paralela: {max_workers} trabajador(es)")
+    several_products = len({generator.base_dir for generator, _ in tasks}) > 1
+    
+    summary = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_build_language_job, generator, lang, force): (generator, lang)
+                   for generator, lang in tasks}
+        for future in as_completed(futures):
+            generator, lang = futures[future]
+            try:
+                job = future.result()
             except Exception as e:
-                print(f"❌ Error procesando {lang}: {e}")
+                job = {'lang': lang, 'ok': False, 'seconds': 0.0,
+                       'log': None, 'error': str(e)}
+            job['product'] = str(generator.base_dir)
+            summary.append(job)
+            if job.get('images') is not None:
+                generator.image_dependencies[lang] = job['images']
+            if job.get('logos') is not None:
+                generator.logo_dependencies[lang] = job['logos']
+            if job.get('report') is not None:
+                generator.reports[lang] = job['report']
+            if job.get('validation') is not None:
+                generator.validation[lang] = job['validation']
+            if job.get('inputs'):
+                generator.record_build(lang, job['inputs'])
+            status = '✅' if job['ok'] else '❌'
+            name = f"{generator.base_dir}:{lang}" if several_products else lang
+            logger.info(f"{status} {name} terminado en {job['seconds']:.1f}s (log: {job['log']})")
+    
+    return summary
+
+def _prometheus_labels(**labels) -> str:
+    """Etiquetas {clave="valor"} con el escapado de Prometheus"""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+def write_prometheus_textfile(path: str, reports: Dict[Tuple[str, str], Dict]):
+    """Escribe los informes por (producto, idioma) en formato textfile de Prometheus"""
+    metrics = {
+        'datasheet_build_success': ('gauge', 'La última compilación terminó bien (1) o falló (0)'),
+        'datasheet_build_skipped': ('gauge', 'La última compilación se omitió por no haber cambios'),
+        'datasheet_build_seconds': ('gauge', 'Duración de la última compilación'),
+        'datasheet_stage_seconds': ('gauge', 'Tiempo acumulado por etapa en la última compilación'),
+        'datasheet_pdflatex_pass_seconds': ('gauge', 'Duración de cada pasada de pdflatex'),
+        'datasheet_bytes': ('gauge', 'Bytes procesados o generados por tipo'),
+        'datasheet_cache_hits': ('gauge', 'Aciertos de caché en la última compilación'),
+        'datasheet_cache_misses': ('gauge', 'Fallos de caché en la última compilación'),
+    }
+    samples: Dict[str, List[str]] = {name: [] for name in metrics}
+    for (product, lang), entry in sorted(reports.items()):
+        base = {'product': product, 'lang': lang}
+        samples['datasheet_build_success'].append(f"{_prometheus_labels(**base)} {int(entry['ok'])}")
+        samples['datasheet_build_skipped'].append(f"{_prometheus_labels(**base)} {int(entry['skipped'])}")
+        samples['datasheet_build_seconds'].append(f"{_prometheus_labels(**base)} {entry['seconds']}")
+        for stage, values in entry['stages'].items():
+            samples['datasheet_stage_seconds'].append(
+                f"{_prometheus_labels(**base, stage=stage)} {values['seconds']}")
+        for run in entry['pdflatex_passes']:
+            samples['datasheet_pdflatex_pass_seconds'].append(
+                f"{_prometheus_labels(**base, **{'pass': run['pass']})} {run['seconds']}")
+        for kind, size in entry['bytes'].items():
+            samples['datasheet_bytes'].append(f"{_prometheus_labels(**base, kind=kind)} {size}")
+        for cache, counters in entry['cache'].items():
+            samples['datasheet_cache_hits'].append(
+                f"{_prometheus_labels(**base, cache=cache)} {counters['hits']}")
+            samples['datasheet_cache_misses'].append(
+                f"{_prometheus_labels(**base, cache=cache)} {counters['misses']}")
+    
+    lines = []
+    for name, (kind, help_text) in metrics.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{sample}" for sample in samples[name])
+    # node_exporter lee el directorio en cualquier momento: escritura atómica
+    _write_atomic(Path(path), '\n'.join(lines) + '\n')
+
+def find_products(patterns: List[str]) -> List[Path]:
+    """Directorios de producto (con idiomas) que coinciden con rutas o globs"""
+    import glob
+    products = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            path = Path(match)
+            if path.is_dir() and path.resolve() not in {p.resolve() for p in products}:
+                products.append(path)
+    return [path for path in products if LatexDocGenerator(str(path)).find_language_dirs()]
+
+def build_catalog(patterns: List[str], jobs: int = 0, force: bool = False,
+                  summary_file: str = DEFAULT_CATALOG_SUMMARY,
+                  cache_dir: Optional[str] = None, metrics_file: Optional[str] = None,
+                  **options) -> Dict:
+    """Compila todos los idiomas de varios productos en un único pool
+    
+    Los productos comparten el directorio de caché (formatos precompilados,
+    almacén de imágenes por contenido e imágenes optimizadas); cada uno
+    conserva su manifiesto en docs/. El resumen se escribe en summary_file.
+    """
+    from datetime import datetime
+    cache_dir = cache_dir or DEFAULT_CATALOG_CACHE
+    generators = [LatexDocGenerator(str(path), cache_dir=cache_dir, **options)
+                  for path in find_products(patterns)]
+    if not generators:
+        logger.warning("No se encontraron productos con idiomas válidos")
+        return {'ok': 0, 'failed': 0, 'products': []}
+    
+    tasks = []
+    for generator in generators:
+        generator.prepare_output_dirs()
+        generator.build_image_indexes()
+        tasks += [(generator, lang) for lang in generator.find_language_dirs()]
+    logger.info(f"📦 Catálogo: {len(generators)} producto(s), {len(tasks)} documento(s)")
+    
+    start = time.perf_counter()
+    jobs_summary = run_build_jobs(tasks, jobs, force=force)
+    
+    products = []
+    for generator in generators:
+        product = str(generator.base_dir)
+        languages = sorted((job for job in jobs_summary if job['product'] == product),
+                           key=lambda j: j['lang'])
+        products.append({
+            'product': product,
+            'ok': all(job['ok'] for job in languages),
+            'languages': [
+                {key: job.get(key) for key in ('lang', 'ok', 'seconds', 'log', 'error')
+                 if job.get(key) is not None}
+                for job in languages
+            ],
+        })
+    ok_count = sum(1 for job in jobs_summary if job['ok'])
+    summary = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(time.perf_counter() - start, 3),
+        'cache_dir': str(cache_dir),
+        'ok': ok_count,
+        'failed': len(jobs_summary) - ok_count,
+        'products': products,
+    }
+    
+    summary_path = Path(summary_file)
+    _write_atomic(summary_path, json.dumps(summary, indent=2, ensure_ascii=False))
+    for generator in generators:
+        generator.write_build_report()
+    if metrics_file:
+        write_prometheus_textfile(metrics_file, {
+            (str(generator.base_dir), lang): entry
+            for generator in generators for lang, entry in generator.reports.items()
+        })
+    
+    logger.info(f"\n📊 Catálogo: {ok_count}/{len(jobs_summary)} documento(s) correctos "
+                f"(resumen: {summary_path})")
+    for job in sorted(jobs_summary, key=lambda j: (j['product'], j['lang'])):
+        if not job['ok']:
+            detail = job.get('error') or f"ver {job['log']}"
+            logger.error(f"   ❌ {job['product']}:{job['lang']}: {detail}")
+    return summary
+
+class _MemoryDocGenerator(LatexDocGenerator):
+    """Generador para la API en memoria: no busca ni copia imágenes
+    
+    Las referencias de imagen se emiten tal cual; los archivos se entregan
+    después a compile_pdf_bytes() como assets con ese mismo nombre.
+    """
+    
+    def resolve_image(self, image_path: str, lang_dir: str) -> Tuple[Optional[str], Optional[Path]]:
+        return image_path, None
+
+class CompilationError(RuntimeError):
+    """pdflatex no produjo un PDF válido"""
+
+def render(content: str, metadata: Dict, template: Optional[str] = None,
+           longtable_rows: int = DEFAULT_LONGTABLE_ROWS) -> str:
+    """Convierte un datasheet (Markdown + metadatos) en LaTeX, sin tocar disco
+    
+    Si no se da template se usa el template.tex junto a este módulo. Las
+    imágenes se referencian por la ruta escrita en el Markdown.
+    """
+    if template is None:
+        template = DEFAULT_TEMPLATE_FILE.read_text(encoding='utf-8')
+    generator = _MemoryDocGenerator(longtable_rows=longtable_rows)
+    return generator.render_document(content, metadata, template)
+
+def compile_pdf_bytes(tex: str, assets: Optional[Dict[str, Union[bytes, str, Path]]] = None,
+                      max_passes: int = DEFAULT_MAX_PASSES) -> bytes:
+    """Compila un documento LaTeX en un directorio temporal y devuelve el PDF
+    
+    assets asocia rutas relativas (las de \\includegraphics, p. ej. logo.png o
+    resources/board.jpg) con su contenido en bytes o con un archivo a copiar.
+    No cambia el directorio actual ni deja archivos; lanza CompilationError si
+    pdflatex falla.
+    """
+    import tempfile
+    with tempfile.TemporaryDirectory(prefix="datasheet-") as tmp_dir:
+        generator = LatexDocGenerator(tmp_dir, max_passes=max_passes, use_format=False)
+        build_dir = generator.docs_dir
+        build_dir.mkdir()
+        
+        for name, data in (assets or {}).items():
+            dest = build_dir / name
+            if build_dir.resolve() not in dest.resolve().parents:
+                raise ValueError(f"Ruta de asset fuera del directorio de compilación: {name}")
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(data, bytes):
+                dest.write_bytes(data)
+            else:
+                _link_or_copy(Path(data), dest)
+        
+        tex_file = build_dir / "datasheet.tex"
+        tex_file.write_text(tex, encoding='utf-8')
+        if not generator.compile_pdf(tex_file):
+            raise CompilationError("pdflatex no generó el PDF")
+        return tex_file.with_suffix('.pdf').read_bytes()
+
+@contextmanager
+def _log_to_file(log_file: Path):
+    """Envía los mensajes del generador solo a log_file mientras dura el bloque"""
+    import logging
+    target = logger.resolve()
+    handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    level, propagate = target.level, target.propagate
+    target.addHandler(handler)
+    target.setLevel(INFO)
+    target.propagate = False
+    try:
+        yield
+    finally:
+        target.removeHandler(handler)
+        target.setLevel(level)
+        target.propagate = propagate
+        handler.close()
+
+def _build_language_job(generator: LatexDocGenerator, lang: str, force: bool = False) -> Dict:
+    """Trabajo del pool: compila un idioma y guarda su salida en docs/build_<lang>.log"""
+    log_file = generator.docs_dir / f"build_{lang}.log"
+    start = time.perf_counter()
+    with _log_to_file(log_file):
+        logger.info(f"📝 Procesando {lang}...")
+        ok = generator.build_language(lang, force=force, record=False)
+    return {
+        'lang': lang,
+        'ok': ok,
+        'seconds': round(time.perf_counter() - start, 3),
+        'log': str(log_file),
+        'inputs': generator.built_inputs.get(lang),
+        'images': generator.image_dependencies.get(lang),
+        'logos': generator.logo_dependencies.get(lang),
+        'report': generator.reports.get(lang),
+        'validation': generator.validation.get(lang),
+    }
+
+# Puerto y tamaño de cola por defecto del modo --serve
+DEFAULT_SERVE_PORT = 8765
+DEFAULT_SERVE_QUEUE = 16
+
+class ServiceBusy(Exception):
+    """La cola de compilaciones del servicio está llena"""
+
+class BuildService:
+    """Servicio de compilación de larga duración (modo --serve)
+    
+    Mantiene un generador por directorio de producto, con sus índices de
+    imágenes, hashes y formato precompilado, y reparte las compilaciones en un
+    pool de hilos acotado (el trabajo pesado lo hace el subproceso pdflatex).
+    Dos peticiones para el mismo producto e idioma se compilan en serie.
+    """
+    
+    def __init__(self, root: str = ".", workers: int = 1,
+                 max_queue: int = DEFAULT_SERVE_QUEUE, **options):
+        from concurrent.futures import ThreadPoolExecutor
+        self.root = Path(root).resolve()
+        self.options = options
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                           thread_name_prefix="build")
+        # Compilaciones en curso más en espera; al llenarse se rechazan
+        self._slots = threading.BoundedSemaphore(self.workers + max(0, max_queue))
+        self._lock = threading.Lock()
+        self._generators: Dict[Path, LatexDocGenerator] = {}
+        self._build_locks: Dict[Tuple[Path, str], threading.Lock] = {}
+    
+    def product_dir(self, product: str) -> Path:
+        """Directorio de un producto, relativo a la raíz del servicio"""
+        path = (self.root / product).resolve()
+        if path != self.root and self.root not in path.parents:
+            raise ValueError(f"Producto fuera de {self.root}: {product}")
+        if not path.is_dir():
+            raise ValueError(f"No existe el producto: {product}")
+        return path
+    
+    def generator(self, path: Path) -> LatexDocGenerator:
+        """Generador (con sus cachés) de un producto, creado la primera vez"""
+        with self._lock:
+            generator = self._generators.get(path)
+            if generator is None:
+                generator = LatexDocGenerator(str(path), **self.options)
+                self._generators[path] = generator
+            return generator
+    
+    def submit(self, product: str, lang: Optional[str] = None, force: bool = False):
+        """Encola una compilación; lanza ServiceBusy si la cola está llena
+        
+        El producto y el idioma se comprueban antes de encolar: si no existen
+        se lanza ValueError y no se ocupa ningún hueco de la cola.
+        """
+        path = self.product_dir(product)
+        if lang is not None and lang not in self.generator(path).find_language_dirs():
+            raise ValueError(f"Idioma sin content.md/metadata.yaml: {lang}")
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy(f"Cola llena ({self.workers} trabajador(es))")
+        try:
+            future = self.executor.submit(self.build, path, lang, force)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+    
+    def build(self, path: Path, lang: Optional[str], force: bool) -> Dict:
+        """Compila uno o todos los idiomas de un producto y describe los artefactos"""
+        generator = self.generator(path)
+        langs = [lang] if lang else generator.find_language_dirs()
+        if lang and lang not in generator.find_language_dirs():
+            raise ValueError(f"Idioma sin content.md/metadata.yaml: {lang}")
+        
+        results = []
+        for name in langs:
+            with self._lock:
+                build_lock = self._build_locks.setdefault((path, name), threading.Lock())
+            start = time.perf_counter()
+            with build_lock:
+                ok = generator.build_language(name, force=force)
+            tex_file = generator.docs_dir / f"datasheet_{name}.tex"
+            results.append({
+                'lang': name,
+                'ok': ok,
+                'seconds': round(time.perf_counter() - start, 3),
+                'tex': str(tex_file),
+                'pdf': str(tex_file.with_suffix('.pdf')),
+                'report': generator.reports.get(name),
+            })
+        return {'product': str(path), 'ok': all(r['ok'] for r in results), 'results': results}
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class _BuildRequestHandler:
+    """HTTP del modo --serve
+    
+    GET /health devuelve el estado del servicio. POST /build recibe JSON
+    {"product": ".", "lang": "en", "force": false, "return": "paths"} y
+    responde con las rutas de los artefactos, o con el PDF si "return" es
+    "pdf" (requiere lang). Se combina con BaseHTTPRequestHandler en serve(),
+    para no importar http.server fuera de ese modo.
+    """
+    
+    service: BuildService = None
+    
+    @staticmethod
+    def build_options(request) -> Tuple[str, Optional[str], bool, bool]:
+        """(producto, idioma, force, devolver PDF) de un cuerpo de POST /build
+        
+        Lanza ValueError (respuesta 400) si el cuerpo no es un objeto JSON o
+        algún campo no tiene el tipo esperado.
+        """
+        if not isinstance(request, dict):
+            raise ValueError("El cuerpo debe ser un objeto JSON")
+        product = request.get('product', '.')
+        lang = request.get('lang')
+        force = request.get('force', False)
+        returned = request.get('return', 'paths')
+        if not isinstance(product, str) or not product:
+            raise ValueError('"product" debe ser una ruta (cadena)')
+        if lang is not None and (not isinstance(lang, str) or not lang):
+            raise ValueError('"lang" debe ser un código de idioma (cadena)')
+        if not isinstance(force, bool):
+            raise ValueError('"force" debe ser true o false')
+        if returned not in ('paths', 'pdf'):
+            raise ValueError('"return" debe ser "paths" o "pdf"')
+        if returned == 'pdf' and not lang:
+            raise ValueError('"return": "pdf" requiere "lang"')
+        return product, lang, force, returned == 'pdf'
+    
+    def do_GET(self):
+        if self.path != '/health':
+            self.send_json(404, {'error': 'not found'})
+            return
+        service = self.service
+        self.send_json(200, {'ok': True, 'workers': service.workers,
+                             'products': [str(p) for p in service._generators]})
+    
+    def do_POST(self):
+        if self.path != '/build':
+            self.send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            # JSON mal formado o mal codificado también es ValueError
+            request = json.loads(self.rfile.read(length) or b'{}')
+            product, lang, force, want_pdf = self.build_options(request)
+            future = self.service.submit(product, lang, force=force)
+        except ServiceBusy as e:
+            self.send_json(503, {'error': str(e)})
+            return
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+        
+        if not want_pdf:
+            self.send_json(200 if result['ok'] else 500, result)
+            return
+        if not result['ok']:
+            self.send_json(500, result)
+            return
+        body = Path(result['results'][0]['pdf']).read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def address_string(self) -> str:
+        # En un socket Unix client_address no es una tupla (host, puerto)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+    
+    def log_message(self, format: str, *args):
+        logger.info(f"🌐 {self.address_string()} {format % args}")
+
+def serve(service: BuildService, host: str = "127.0.0.1", port: int = DEFAULT_SERVE_PORT,
+          socket_path: Optional[str] = None):
+    """Atiende peticiones de compilación por HTTP (o socket Unix) hasta Ctrl+C"""
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """Servidor HTTP sobre un socket Unix"""
+        daemon_threads = True
+    
+    handler = type('BuildRequestHandler', (_BuildRequestHandler, BaseHTTPRequestHandler),
+                   {'service': service})
+    if socket_path:
+        Path(socket_path).unlink(missing_ok=True)
+        server = _UnixHTTPServer(socket_path, handler)
+        address = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        address = f"http://{host}:{server.server_address[1]}"
+    
+    logger.info(f"🛰️  Servicio de compilación en {address} "
+                f"({service.workers} trabajador(es))")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if socket_path:
+            Path(socket_path).unlink(missing_ok=True)
+
+# Espera sin cambios antes de recompilar en --watch (segundos)
+DEFAULT_WATCH_DEBOUNCE = 0.3
+# Intervalo de sondeo cuando no hay inotify (segundos)
+WATCH_POLL_INTERVAL = 1.0
+
+class PollingWatcher:
+    """Detecta cambios comparando mtime y tamaño de los archivos vigilados"""
+    
+    def __init__(self, list_files, interval: float = WATCH_POLL_INTERVAL):
+        self.list_files = list_files
+        self.interval = interval
+        self.snapshot = self.scan()
+    
+    def scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.list_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def wait(self, timeout: Optional[float] = None) -> set:
+        """Rutas creadas, modificadas o borradas (conjunto vacío si vence timeout)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+    
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Detecta cambios con inotify (Linux), vigilando directorios"""
+    
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+            IN_MOVED_TO | IN_CREATE | IN_DELETE)
+    
+    def __init__(self, directories: List[Path], recursive: List[Path]):
+        import ctypes
+        import ctypes.util
+        
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.watches: Dict[int, Path] = {}
+        self.recursive = [path.resolve() for path in recursive if path.is_dir()]
+        for directory in directories:
+            self.add(directory)
+        for directory in self.recursive:
+            for path in [directory, *directory.rglob('*')]:
+                if path.is_dir():
+                    self.add(path)
+    
+    def add(self, directory: Path):
+        if not directory.is_dir():
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self.watches[wd] = directory.resolve()
+    
+    def wait(self, timeout: Optional[float] = None) -> set:
+        """Rutas con eventos (conjunto vacío si vence timeout)"""
+        import select
+        import struct
+        
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        # struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+        while offset + 16 <= len(data):
+            wd, mask, _cookie, length = struct.unpack_from('iIII', data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b'\0')
+            offset += 16 + length
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                # Subdirectorio nuevo de un árbol vigilado (images/**) o idioma nuevo
+                self.add(path)
+            changed.add(path)
+        return changed
+    
+    def close(self):
+        os.close(self.fd)
+
+def _watch_paths(generator: LatexDocGenerator) -> Tuple[Path, Path, Path, List[Path]]:
+    """Directorio base, template.tex, document_standards.yaml e imágenes de --watch"""
+    base_dir = generator.base_dir.resolve()
+    return (base_dir, generator.template_file.resolve(), base_dir / "document_standards.yaml",
+            [generator.images_dir.resolve(), (generator.docs_dir / "resources").resolve()])
+
+def _dependencies(generator: LatexDocGenerator, lang: str, refresh: bool) -> Dict[str, Optional[Path]]:
+    """Imágenes y logos de un idioma: los registrados o (refresh) los actuales"""
+    if refresh:
+        images, logos = generator.referenced_images(lang), generator.logo_files(lang)
+    else:
+        images = generator.image_dependencies.get(lang, {})
+        logos = generator.logo_dependencies.get(lang, {})
+    return {**{f"image:{ref}": source and source.resolve() for ref, source in images.items()},
+            **{f"logo:{ref}": source and source.resolve() for ref, source in logos.items()}}
+
+def affected_languages(generator: LatexDocGenerator, changed: set) -> List[str]:
+    """Idiomas que hay que recompilar tras cambiar los archivos de changed
+    
+    Un cambio en template.tex o document_standards.yaml afecta a todos los
+    idiomas, uno en <lang>/ solo a ese idioma y uno en una imagen (o en el
+    logo de la plantilla) solo a los idiomas que la usan o que ahora resuelven
+    otra.
+    """
+    base_dir, template_file, standards_file, image_dirs = _watch_paths(generator)
+    langs = generator.find_language_dirs()
+    affected = set()
+    image_changed = set()
+    for path in changed:
+        if path in (template_file, standards_file):
+            return langs
+        if path.parent.parent == base_dir and path.parent.name in langs:
+            if path.name in ("content.md", "metadata.yaml"):
+                affected.add(path.parent.name)
+        elif path.parent == base_dir and path.name in langs:
+            affected.add(path.name)  # idioma nuevo
+        elif any(directory == path or directory in path.parents for directory in image_dirs):
+            image_changed.add(path)
+    
+    if image_changed:
+        for lang in langs:
+            before = _dependencies(generator, lang, refresh=False)
+            after = _dependencies(generator, lang, refresh=True)
+            if before != after or image_changed & set(after.values()):
+                affected.add(lang)
+    return sorted(affected)
+
+def watch(generator: LatexDocGenerator, jobs: int = 1,
+          debounce: float = DEFAULT_WATCH_DEBOUNCE, polling: bool = False,
+          metrics_file: Optional[str] = None):
+    """Recompila los idiomas afectados cada vez que cambia una entrada
+    
+    Los idiomas a recompilar los decide affected_languages. Las ráfagas de
+    guardados se agrupan hasta que pasan debounce segundos sin cambios.
+    """
+    base_dir, template_file, standards_file, image_dirs = _watch_paths(generator)
+    
+    def watched_files() -> List[Path]:
+        files = [template_file, standards_file]
+        for lang in generator.find_language_dirs():
+            files += [base_dir / lang / "content.md", base_dir / lang / "metadata.yaml"]
+        for directory in image_dirs:
+            if directory.is_dir():
+                files += [path for path in directory.rglob('*') if path.is_file()]
+        return files
+    
+    def rebuild(langs: List[str]):
+        if jobs != 1 and len(langs) > 1:
+            generator.generate_parallel(langs, jobs)
+        else:
+            for lang in langs:
+                logger.info(f"\n📝 Procesando {lang}...")
+                generator.build_language(lang)
+        generator.write_build_report(metrics_file)
+    
+    generator.prepare_output_dirs()
+    rebuild(generator.find_language_dirs())
+    
+    watcher = None
+    if not polling:
+        try:
+            watcher = InotifyWatcher([base_dir, template_file.parent,
+                                      *(base_dir / lang for lang in generator.find_language_dirs())],
+                                     recursive=image_dirs)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"⚠️  inotify no disponible ({e}), se usa sondeo")
+    if watcher is None:
+        watcher = PollingWatcher(watched_files)
+    
+    logger.info(f"👀 Vigilando cambios en {base_dir} (Ctrl+C para salir)")
+    try:
+        while True:
+            changed = watcher.wait()
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            
+            langs = affected_languages(generator, changed)
+            if langs:
+                logger.info(f"\n🔄 Cambios detectados, recompilando: {', '.join(langs)}")
+                rebuild(langs)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+# Línea de -X importtime: "import time: <propio> | <acumulado> | <sangría><módulo>"
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+# Módulos listados en el resumen de --startup-profile
+STARTUP_PROFILE_TOP = 10
+
+def startup_profile(argv: List[str], top: int = STARTUP_PROFILE_TOP) -> int:
+    """Ejecuta el generador bajo -X importtime y resume el coste del arranque
+    
+    La salida de la ejecución se reenvía tal cual; al terminar se listan los
+    imports directos y los módulos más caros. Devuelve el código de salida
+    de la ejecución.
+    """
+    import subprocess
+    command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), *argv]
+    modules = []  # (propio, acumulado, profundidad, módulo) en microsegundos
+    start = time.perf_counter()
+    with subprocess.Popen(command, stderr=subprocess.PIPE, text=True, errors='replace') as process:
+        for line in process.stderr:
+            if not line.startswith('import time:'):
+                sys.stderr.write(line)
+                continue
+            match = IMPORTTIME_PATTERN.match(line)
+            if match is None:
+                # Cabecera de -X importtime
+                continue
+            own, cumulative, indent, name = match.groups()
+            modules.append((int(own), int(cumulative), len(indent) // 2, name))
+        returncode = process.wait()
+    elapsed = time.perf_counter() - start
+    
+    direct = [module for module in modules if module[2] == 0]
+    total = sum(module[1] for module in direct)
+    logger.info(f"\n⏱️  Arranque: {total / 1000:.1f} ms en imports "
+                f"({len(modules)} módulos), {elapsed * 1000:.1f} ms de ejecución total")
+    logger.info("   Imports directos (acumulado):")
+    for own, cumulative, _, name in sorted(direct, key=lambda module: -module[1])[:top]:
+        logger.info(f"   {cumulative / 1000:8.1f} ms  {name}")
+    logger.info("   Módulos más caros (tiempo propio):")
+    for own, cumulative, _, name in sorted(modules, key=lambda module: -module[0])[:top]:
+        logger.info(f"   {own / 1000:8.1f} ms  {name}")
+    return returncode
 
 def main():
+    import argparse
     parser = argparse.ArgumentParser(description="Generador de Documentación LaTeX")
     parser.add_argument('--lang', help='Idioma específico')
     parser.add_argument('--dir', default='.', help='Directorio base')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Idiomas a compilar en paralelo (0 = uno por CPU)')
+    parser.add_argument('--force', action='store_true',
+                        help='Recompilar aunque las entradas no hayan cambiado')
+    parser.add_argument('--max-passes', type=int, default=DEFAULT_MAX_PASSES,
+                        help='Máximo de pasadas de pdflatex por documento')
+    parser.add_argument('--no-format', action='store_true',
+                        help='No usar el preámbulo precompilado de template.tex')
+    parser.add_argument('--longtable-rows', type=int, default=DEFAULT_LONGTABLE_ROWS,
+                        help='Filas a partir de las cuales una tabla usa longtable')
+    parser.add_argument('--optimize-images', action='store_true',
+                        help='Reducir las imágenes a la resolución de impresión (requiere Pillow)')
+    parser.add_argument('--image-dpi', type=int, default=DEFAULT_IMAGE_DPI,
+                        help='Resolución objetivo de las imágenes optimizadas')
+    parser.add_argument('--jpeg-quality', type=int, default=DEFAULT_JPEG_QUALITY,
+                        help='Calidad JPEG de las imágenes optimizadas')
+    
+    parser.add_argument('--serve', action='store_true',
+                        help='Quedarse en ejecución y atender compilaciones por HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Dirección del modo --serve')
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVE_PORT,
+                        help='Puerto del modo --serve')
+    parser.add_argument('--socket', help='Socket Unix para el modo --serve (en lugar de TCP)')
+    parser.add_argument('--queue', type=int, default=DEFAULT_SERVE_QUEUE,
+                        help='Compilaciones en espera admitidas por el modo --serve')
+    
+    parser.add_argument('--keep-going', action='store_true',
+                        help='No detener pdflatex ante errores recuperables')
+    parser.add_argument('--draft', action='store_true',
+                        help='Borrador rápido: imágenes como marcos y una sola pasada real')
+    parser.add_argument('--sections',
+                        help='Solo las secciones cuyo título contiene estos textos (separados por comas)')
+    parser.add_argument('--metrics-file',
+                        help='Escribir también las medidas de docs/build-report.json como '
+                             'textfile de Prometheus')
+    parser.add_argument('--catalog', nargs='+', metavar='PRODUCTO',
+                        help='Compilar varios productos (rutas o globs) en un único pool')
+    parser.add_argument('--summary', default=DEFAULT_CATALOG_SUMMARY,
+                        help='Resumen JSON del modo --catalog')
+    parser.add_argument('--cache-dir',
+                        help='Caché de formatos e imágenes (por defecto docs/.build-cache; '
+                             f'en --catalog, {DEFAULT_CATALOG_CACHE} compartida)')
+    parser.add_argument('--validate', action='store_true',
+                        help='Validar los estándares sobre el mismo análisis que se compila')
+    parser.add_argument('--standards',
+                        help='document_standards.yaml de --validate (por defecto el del producto)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Orquestar las compilaciones con asyncio en un único proceso')
+    parser.add_argument('--tex-jobs', type=int, default=0,
+                        help='En --async, pdflatex simultáneos (0 = según CPUs y memoria)')
+    parser.add_argument('--timeout', type=float,
+                        help='En --async, segundos máximos por idioma antes de cancelarlo')
+    parser.add_argument('--watch', action='store_true',
+                        help='Recompilar los idiomas afectados al cambiar sus entradas')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_WATCH_DEBOUNCE,
+                        help='Segundos sin cambios antes de recompilar en --watch')
+    parser.add_argument('--poll', action='store_true',
+                        help='En --watch, sondear en lugar de usar inotify')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='Medir el tiempo de importación del arranque (-X importtime)')
     
     args = parser.parse_args()
+    logger.console_level = INFO
+    
+    # La ejecución medida se relanza con -X importtime; dentro de ella la
+    # opción ya no hace nada
+    if args.startup_profile and 'importtime' not in sys._xoptions:
+        sys.exit(startup_profile([arg for arg in sys.argv[1:] if arg != '--startup-profile']))
+    sections = args.sections.split(',') if args.sections else None
+    
+    options = dict(max_passes=args.max_passes,
+                   use_format=not args.no_format,
+                   optimize_images=args.optimize_images,
+                   image_dpi=args.image_dpi,
+                   jpeg_quality=args.jpeg_quality,
+                   longtable_rows=args.longtable_rows,
+                   draft=args.draft, sections=sections,
+                   halt_on_error=not args.keep_going)
+    
+    if args.serve:
+        service = BuildService(args.dir, workers=args.jobs, max_queue=args.queue,
+                               cache_dir=args.cache_dir, **options)
+        serve(service, args.host, args.port, args.socket)
+        return
+    
+    if args.catalog:
+        summary = build_catalog(args.catalog, jobs=args.jobs, force=args.force,
+                                summary_file=args.summary, cache_dir=args.cache_dir,
+                                metrics_file=args.metrics_file, **options)
+        sys.exit(1 if summary['failed'] else 0)
+    
+    generator = LatexDocGenerator(args.dir, cache_dir=args.cache_dir, validate=args.validate,
+                                  standards_file=args.standards, **options)
+    
+    if args.watch:
+        watch(generator, jobs=args.jobs, debounce=args.debounce, polling=args.poll,
+              metrics_file=args.metrics_file)
+        return
     
-    generator = LatexDocGenerator(args.dir)
+    if args.use_async:
+        import asyncio
+        results = asyncio.run(generator.generate_all_async(
+            force=args.force, timeout=args.timeout, tex_jobs=args.tex_jobs,
+            langs=[args.lang] if args.lang else None))
+        generator.write_build_report(args.metrics_file)
+        valid = generator.write_validation_report() if args.validate else True
+        sys.exit(0 if all(results.values()) and valid else 1)
     
     if args.lang:
-        print(f"🚀 Generando para {args.lang}...")
-        try:
-            latex_doc = generator.generate_document(args.lang)
-            tex_file = generator.docs_dir / f"datasheet_{args.lang}.tex"
-            
-            with open(tex_file, 'w', encoding='utf-8') as f:
-                f.write(latex_doc)
-            
-            print(f"✅ LaTeX generado: {tex_file}")
-            
-            if generator.compile_pdf(tex_file):
-                pdf_file = tex_file.with_suffix('.pdf')
-                size_kb = pdf_file.stat().st_size // 1024
-                print(f"✅ PDF generado: {pdf_file} ({size_kb} KB)")
-            else:
-                print(f"❌ Error compilando PDF")
-        except Exception as e:
-            print(f"❌ Error: {e}")
+        logger.info(f"🚀 Generando para {args.lang}...")
+        results = {args.lang: generator.build_language(args.lang, force=args.force)}
     else:
-        generator.generate_all()
+        results = generator.generate_all(jobs=args.jobs, force=args.force)
+    generator.write_build_report(args.metrics_file)
+    valid = generator.write_validation_report() if args.validate else True
+    # Código de salida distinto de cero si falla algún idioma, para que CI lo detecte
+    sys.exit(0 if all(results.values()) and valid else 1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la compilación por idioma sin pdflatex (errores de entrada)
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_final import LatexDocGenerator
+
+class MissingLanguageTest(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        (self.base_dir / "template.tex").write_text("$body$\n", encoding='utf-8')
+        self.generator = LatexDocGenerator(str(self.base_dir))
+    
+    def test_build_language_reports_failure(self):
+        with self.assertLogs('generate_final', level='ERROR') as logs:
+            self.assertFalse(self.generator.build_language('xx'))
+        self.assertIn('❌ Error procesando xx', logs.output[0])
+        self.assertFalse(self.generator.reports['xx']['ok'])
+    
+    def test_parallel_build_reports_failure(self):
+        with self.assertLogs('generate_final', level='ERROR'):
+            self.assertEqual(self.generator.generate_parallel(['xx'], jobs=2), {'xx': False})
+    
+    def test_nothing_written_for_missing_language(self):
+        with self.assertLogs('generate_final', level='ERROR'):
+            self.generator.build_language('xx')
+        self.assertFalse((self.base_dir / "docs").exists())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Pruebas del tokenizador Markdown en línea (parse_inline) y su salida LaTeX
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generate_final
+from generate_final import parse_inline
+
+class NestedEmphasisTest(unittest.TestCase):
+    def test_bold_inside_italic(self):
+        self.assertEqual(parse_inline('*a **b** c*'), [
+            ('italic', [('text', 'a '), ('bold', [('text', 'b')]), ('text', ' c')]),
+        ])
+    
+    def test_italic_inside_bold(self):
+        self.assertEqual(parse_inline('**a *b* c**'), [
+            ('bold', [('text', 'a '), ('italic', [('text', 'b')]), ('text', ' c')]),
+        ])
+    
+    def test_code_inside_italic_keeps_asterisks(self):
+        self.assertEqual(parse_inline('*use `a*b` here*'), [
+            ('italic', [('text', 'use '), ('code', 'a*b'), ('text', ' here')]),
+        ])
+    
+    def test_consecutive_italics(self):
+        self.assertEqual(parse_inline('*a* and *b*'), [
+            ('italic', [('text', 'a')]), ('text', ' and '), ('italic', [('text', 'b')]),
+        ])
+    
+    def test_rendered_without_stray_asterisks(self):
+        tex = generate_final.render('Texto *a **b** c* fin.', {'title': 'T'})
+        self.assertIn(r'Texto \textit{a \textbf{b} c} fin.', tex)
+
+if __name__ == "__main__":
+    unittest.main()
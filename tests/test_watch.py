@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Pruebas del grafo de dependencias de --watch (affected_languages)
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_final import LatexDocGenerator, affected_languages
+
+class AffectedLanguagesTest(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        (self.base_dir / "template.tex").write_text("$body$\n", encoding='utf-8')
+        (self.base_dir / "images").mkdir()
+        (self.base_dir / "images" / "logo.png").write_bytes(b'logo')
+        (self.base_dir / "images" / "resources").mkdir()
+        (self.base_dir / "images" / "resources" / "diagram.png").write_bytes(b'diagram')
+        (self.base_dir / "images" / "unused.png").write_bytes(b'unused')
+        for lang, content in (('en', "![Diagram](resources/diagram.png)\n"), ('es', "Texto\n")):
+            (self.base_dir / lang).mkdir()
+            (self.base_dir / lang / "content.md").write_text(content, encoding='utf-8')
+            (self.base_dir / lang / "metadata.yaml").write_text('logo: "logo.png"\n', encoding='utf-8')
+        
+        self.generator = LatexDocGenerator(str(self.base_dir))
+        # Lo que registra una compilación antes de vigilar
+        for lang in self.generator.find_language_dirs():
+            self.generator.compute_input_hashes(lang)
+    
+    def affected(self, *names: str):
+        changed = {(self.base_dir / name).resolve() for name in names}
+        return affected_languages(self.generator, changed)
+    
+    def test_logo_rebuilds_every_language(self):
+        (self.base_dir / "images" / "logo.png").write_bytes(b'new logo')
+        self.assertEqual(self.affected("images/logo.png"), ['en', 'es'])
+    
+    def test_metadata_logo_rebuilds_its_languages(self):
+        (self.base_dir / "images" / "brand.png").write_bytes(b'brand')
+        (self.base_dir / "es" / "metadata.yaml").write_text('logo: "brand.png"\n', encoding='utf-8')
+        self.generator.compute_input_hashes('es')
+        self.assertEqual(self.affected("images/brand.png"), ['es'])
+    
+    def test_content_image_rebuilds_only_its_language(self):
+        self.assertEqual(self.affected("images/resources/diagram.png"), ['en'])
+    
+    def test_unused_image_rebuilds_nothing(self):
+        self.assertEqual(self.affected("images/unused.png"), [])
+    
+    def test_template_rebuilds_every_language(self):
+        self.assertEqual(self.affected("template.tex"), ['en', 'es'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,26 +6,165 @@ Valida que la documentación siga las mejores prácticas para proyectos en desar
 
 import yaml
 import os
+import re
 import sys
+import glob
+import json
+import time
+import bisect
+import hashlib
 import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml_cache
+from yaml_cache import YamlCache, safe_load
+from dataclasses import dataclass
 from datetime import datetime
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Listas por defecto si document_standards.yaml no define las suyas
+DEVELOPMENT_KEYWORDS = ['prototype', 'development', 'preliminary', 'testing', 'evaluation']
+CERTIFICATION_CLAIMS = ['certified', 'complies with', 'meets standard', 'certified to']
+
+# Caché y reporte por defecto del modo --batch
+DEFAULT_BATCH_CACHE = ".validation-cache.json"
+DEFAULT_BATCH_REPORT = "validation-summary.json"
+# Formato de la caché de --batch y entradas que conserva (las más recientes)
+BATCH_CACHE_VERSION = 1
+MAX_BATCH_CACHE_ENTRIES = 10000
+# YAML ya analizado de --batch (la misma caché que generate_final.py --catalog)
+DEFAULT_YAML_CACHE = ".build-cache/yaml"
+
+# Inicio de un título Markdown, con numeración opcional ("## 2.1 ")
+HEADER_PREFIX = r'^#{1,6}[ \t]+(?:\d+(?:\.\d+)*\.?[ \t]*)?'
+SECTION_NUMBER_PATTERN = re.compile(r'^\d+(?:\.\d+)*\.?\s*')
+
+@dataclass
+class PatternRule:
+    """Frase a buscar en el contenido
+    
+    kind agrupa las reglas (sección recomendada, palabra clave, ...) y name es
+    como se reporta; header_only exige que la frase abra un título Markdown.
+    """
+    kind: str
+    name: str
+    phrase: str
+    header_only: bool = False
+    case_sensitive: bool = False
+
+@dataclass
+class PatternHit:
+    """Aparición de una regla en el contenido (línea 1-based)"""
+    kind: str
+    name: str
+    line: int
+
+class MultiPatternMatcher:
+    """Busca todas las reglas en una sola pasada sobre el contenido
+    
+    Las frases se compilan en una única expresión regular (alternativas de la
+    más larga a la más corta); las más cortas que son prefijo de la encontrada
+    se reportan con ella, y la búsqueda sigue en el carácter siguiente, así que
+    también se ven las apariciones solapadas.
+    """
+    
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.by_phrase = {'header': {}, 'text': {}}
+        for rule in self.rules:
+            group = 'header' if rule.header_only else 'text'
+            self.by_phrase[group].setdefault(rule.phrase.lower(), []).append(rule)
+        
+        # Frases más cortas que empiezan en la misma posición que cada frase
+        self.prefixes = {
+            group: {phrase: [other for other in phrases if other != phrase and phrase.startswith(other)]
+                    for phrase in phrases}
+            for group, phrases in self.by_phrase.items()
+        }
+        
+        def alternation(phrases):
+            if not phrases:
+                return '(?!)'
+            return '|'.join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+        
+        self.pattern = re.compile(
+            f"{HEADER_PREFIX}(?P<header>{alternation(self.by_phrase['header'])})"
+            f"|(?P<text>{alternation(self.by_phrase['text'])})",
+            re.IGNORECASE | re.MULTILINE)
+    
+    def scan(self, content):
+        """Todas las apariciones de las reglas, con su número de línea"""
+        hits = []
+        if not self.rules:
+            return hits
+        line_starts = [0] + [match.end() for match in re.finditer('\n', content)]
+        
+        position = 0
+        while True:
+            match = self.pattern.search(content, position)
+            if match is None:
+                break
+            group = 'header' if match.group('header') is not None else 'text'
+            start = match.start(group)
+            line = bisect.bisect_right(line_starts, start)
+            found = match.group(group).lower()
+            for phrase in [found] + self.prefixes[group][found]:
+                for rule in self.by_phrase[group][phrase]:
+                    if rule.case_sensitive and content[start:start + len(rule.phrase)] != rule.phrase:
+                        continue
+                    hits.append(PatternHit(rule.kind, rule.name, line))
+            position = match.start() + 1
+        return hits
+
+def hit_lines(hits):
+    """{(kind, name): [líneas]} de una lista de apariciones"""
+    lines = {}
+    for hit in hits:
+        lines.setdefault((hit.kind, hit.name), []).append(hit.line)
+    return lines
+
+def compile_standards(document_standards):
+    """Compila las listas de document_standards en un MultiPatternMatcher
+    
+    Con section_match: header las secciones solo cuentan como título.
+    """
+    header_only = document_standards.get('section_match', 'anywhere') == 'header'
+    rules = []
+    for section in document_standards.get('recommended_sections', []):
+        rules.append(PatternRule('recommended_section', section,
+                                 section.split('.', 1)[-1].strip(), header_only))
+    for section in document_standards.get('required_sections', []):
+        # En un título la numeración la cubre HEADER_PREFIX
+        phrase = SECTION_NUMBER_PATTERN.sub('', section) if header_only else section
+        rules.append(PatternRule('required_section', section, phrase, header_only,
+                                 case_sensitive=True))
+    for keyword in document_standards.get('development_keywords', DEVELOPMENT_KEYWORDS):
+        rules.append(PatternRule('development_keyword', keyword, keyword))
+    for claim in document_standards.get('certification_claims', CERTIFICATION_CLAIMS):
+        rules.append(PatternRule('certification_claim', claim, claim))
+    return MultiPatternMatcher(rules)
+
 class DevelopmentDocumentValidator:
     """Validador para documentación de proyectos en desarrollo"""
     
-    def __init__(self, standards_file='document_standards.yaml'):
+    def __init__(self, standards_file='document_standards.yaml', standards=None, matcher=None):
         self.standards_file = standards_file
-        self.load_standards()
+        if standards is None:
+            self.load_standards()
+        else:
+            # Estándares ya cargados (contenido completo del YAML)
+            self.standards = standards['document_standards']
+        self.matcher = matcher or compile_standards(self.standards)
     
     def load_standards(self):
         """Cargar configuración de estándares de desarrollo"""
         try:
             with open(self.standards_file, 'r', encoding='utf-8') as f:
-                self.standards = yaml.safe_load(f)['document_standards']
+                self.standards = safe_load(f)['document_standards']
             logger.info("Configuración de desarrollo cargada correctamente")
         except FileNotFoundError:
             logger.error(f"Archivo de configuración no encontrado: {self.standards_file}")
@@ -40,7 +179,7 @@ class DevelopmentDocumentValidator:
         
         try:
             with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = yaml.safe_load(f)
+                metadata = safe_load(f)
         except FileNotFoundError:
             logger.error(f"Archivo de metadata no encontrado: {metadata_file}")
             return False
@@ -48,6 +187,13 @@ class DevelopmentDocumentValidator:
             logger.error(f"Error al cargar metadata: {e}")
             return False
         
+        errors, warnings = self.check_metadata(metadata)
+        self.log_results("metadata", errors, warnings,
+                         "Metadata validada correctamente para desarrollo")
+        return len(errors) == 0
+    
+    def check_metadata(self, metadata):
+        """Errores y advertencias de metadata ya cargada"""
         errors = []
         warnings = []
         
@@ -87,21 +233,22 @@ class DevelopmentDocumentValidator:
         if version and not any(x in version for x in ['Rev.', 'V.', 'v.']):
             warnings.append(f"Formato de versión '{version}' no sigue el estándar")
         
-        # Reportar resultados
+        return errors, warnings
+    
+    def log_results(self, subject, errors, warnings, success_message):
+        """Reportar errores y advertencias de una validación"""
         if errors:
-            logger.error("Errores encontrados en metadata:")
+            logger.error(f"Errores encontrados en {subject}:")
             for error in errors:
                 logger.error(f"  - {error}")
         
         if warnings:
-            logger.warning("Advertencias en metadata:")
+            logger.warning(f"Advertencias en {subject}:")
             for warning in warnings:
                 logger.warning(f"  - {warning}")
         
         if not errors and not warnings:
-            logger.info("Metadata validada correctamente para desarrollo")
-        
-        return len(errors) == 0
+            logger.info(success_message)
     
     def validate_content(self, content_file):
         """Validar contenido del documento"""
@@ -114,41 +261,39 @@ class DevelopmentDocumentValidator:
             logger.error(f"Archivo de contenido no encontrado: {content_file}")
             return False
         
+        errors, warnings = self.check_content(content)
+        self.log_results("contenido", errors, warnings, "Contenido validado correctamente")
+        return len(errors) == 0
+    
+    def check_content(self, content, hits=None):
+        """Errores y advertencias del texto de content.md ya leído
+        
+        hits son las apariciones de self.matcher si ya se buscaron.
+        """
         errors = []
         warnings = []
+        if hits is None:
+            hits = self.matcher.scan(content)
+        found = hit_lines(hits)
         
         # Verificar secciones recomendadas para desarrollo
         recommended_sections = self.standards['recommended_sections']
         for section in recommended_sections:
-            if section.split('.')[1].strip().upper() not in content.upper():
+            if ('recommended_section', section) not in found:
                 warnings.append(f"Sección recomendada faltante: {section}")
         
         # Verificar que se mencione el estado de desarrollo
-        development_keywords = ['prototype', 'development', 'preliminary', 'testing', 'evaluation']
-        if not any(keyword in content.lower() for keyword in development_keywords):
+        if not any(kind == 'development_keyword' for kind, _ in found):
             warnings.append("El documento debería indicar claramente que es para desarrollo/prototipo")
         
         # Verificar que no se hagan afirmaciones de certificación
-        certification_claims = ['certified', 'complies with', 'meets standard', 'certified to']
-        for claim in certification_claims:
-            if claim in content.lower():
-                errors.append(f"Evite afirmaciones de certificación no verificadas: '{claim}'")
+        for claim in self.standards.get('certification_claims', CERTIFICATION_CLAIMS):
+            lines = found.get(('certification_claim', claim))
+            if lines:
+                errors.append(f"Evite afirmaciones de certificación no verificadas: '{claim}' "
+                              f"(línea {', '.join(str(line) for line in lines)})")
         
-        # Reportar resultados
-        if errors:
-            logger.error("Errores encontrados en contenido:")
-            for error in errors:
-                logger.error(f"  - {error}")
-        
-        if warnings:
-            logger.warning("Advertencias en contenido:")
-            for warning in warnings:
-                logger.warning(f"  - {warning}")
-        
-        if not errors and not warnings:
-            logger.info("Contenido validado correctamente")
-        
-        return len(errors) == 0
+        return errors, warnings
     
     def generate_development_report(self, language='en'):
         """Generar reporte de estado de desarrollo"""
@@ -161,7 +306,11 @@ class DevelopmentDocumentValidator:
         metadata_valid = self.validate_metadata(metadata_file)
         content_valid = self.validate_content(content_file)
         
-        # Generar resumen
+        self.print_summary(language, metadata_valid, content_valid)
+        return metadata_valid and content_valid
+    
+    def print_summary(self, language, metadata_valid, content_valid):
+        """Imprimir el resumen del reporte de desarrollo"""
         print("\n" + "="*60)
         print(f"REPORTE DE VALIDACIÓN DE DESARROLLO ({language.upper()})")
         print("="*60)
@@ -182,12 +331,32 @@ class DevelopmentDocumentValidator:
             print("⚠️  Corrija los errores antes de proceder")
         
         print("="*60)
-        
-        return metadata_valid and content_valid
 
 def main():
     """Función principal"""
-    validator = DevelopmentDocumentValidator()
+    parser = argparse.ArgumentParser(description="Validador de Documentación de Desarrollo")
+    parser.add_argument('--batch', nargs='+', metavar='PRODUCTO',
+                        help='Validar todos los idiomas de varios productos (rutas o globs)')
+    parser.add_argument('--compliance', action='store_true',
+                        help='Reporte de cumplimiento de estándares de los idiomas del directorio actual')
+    parser.add_argument('--standards', default='document_standards.yaml',
+                        help='Archivo de estándares')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='Procesos de --batch (0 = uno por CPU)')
+    parser.add_argument('--cache', default=DEFAULT_BATCH_CACHE,
+                        help='Caché de resultados de --batch')
+    parser.add_argument('--json', default=DEFAULT_BATCH_REPORT, help='Reporte JSON de --batch')
+    parser.add_argument('--junit', help='Reporte JUnit XML de --batch')
+    parser.add_argument('--yaml-cache', default=DEFAULT_YAML_CACHE,
+                        help='Caché de YAML analizado de --batch ("" para desactivarla)')
+    args = parser.parse_args()
+    
+    if args.batch:
+        sys.exit(batch_main(args))
+    if args.compliance:
+        sys.exit(0 if compliance_main(args.standards) else 1)
+    
+    validator = DevelopmentDocumentValidator(args.standards)
     
     # Validar ambos idiomas
     languages = ['en', 'es']
@@ -201,24 +370,37 @@ def main():
     
     sys.exit(0 if all_valid else 1)
 
-if __name__ == "__main__":
-    main()
-
 import yaml
 import os
+import re
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
+
+# Títulos Markdown: (nivel, texto, línea)
+HEADING_PATTERN = re.compile(r'^(#+) (.+)$')
+
+def markdown_headings(content: str) -> List[Tuple[int, str, int]]:
+    """Títulos del contenido como (nivel, texto, línea 1-based)"""
+    headings = []
+    for number, line in enumerate(content.split('\n'), 1):
+        match = HEADING_PATTERN.match(line)
+        if match:
+            headings.append((len(match.group(1)), match.group(2), number))
+    return headings
 
 class DocumentStandardsValidator:
-    def __init__(self, standards_file: str = "document_standards.yaml"):
+    def __init__(self, standards_file: str = "document_standards.yaml",
+                 standards: Optional[Dict] = None,
+                 matcher: Optional[MultiPatternMatcher] = None):
         self.standards_file = Path(standards_file)
-        self.standards = self.load_standards()
+        self.standards = standards if standards is not None else self.load_standards()
+        self.matcher = matcher or compile_standards(self.standards.get('document_standards', {}))
         
     def load_standards(self) -> Dict:
         """Carga los estándares de documentación"""
         try:
             with open(self.standards_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return safe_load(f)
         except Exception as e:
             print(f"Error cargando estándares: {e}")
             return {}
@@ -234,12 +416,24 @@ class DocumentStandardsValidator:
         
         try:
             with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = yaml.safe_load(f)
+                metadata = safe_load(f)
         except Exception as e:
             results['valid'] = False
             results['errors'].append(f"Error leyendo metadata: {e}")
             return results
         
+        return self.check_metadata(metadata, results)
+    
+    def check_metadata(self, metadata: Dict, results: Optional[Dict] = None) -> Dict:
+        """Valida metadatos ya cargados"""
+        if results is None:
+            results = {
+                'valid': True,
+                'missing_fields': [],
+                'recommendations': [],
+                'errors': []
+            }
+        
         # Verificar campos obligatorios
         required_fields = self.standards['document_standards']['required_metadata']
         for field in required_fields:
@@ -283,10 +477,35 @@ class DocumentStandardsValidator:
             results['structure_issues'].append(f"Error leyendo contenido: {e}")
             return results
         
+        return self.check_content_structure(content, results=results)
+    
+    def check_content_structure(self, content: str,
+                                headings: Optional[List[Tuple[int, str, int]]] = None,
+                                results: Optional[Dict] = None,
+                                hits: Optional[List[PatternHit]] = None) -> Dict:
+        """Valida la estructura de un contenido ya leído
+        
+        headings son los títulos (nivel, texto, línea) si ya se analizó el
+        Markdown; si no, se extraen del texto. hits, las apariciones de
+        self.matcher si ya se buscaron.
+        """
+        if results is None:
+            results = {
+                'valid': True,
+                'missing_sections': [],
+                'structure_issues': [],
+                'recommendations': []
+            }
+        if headings is None:
+            headings = markdown_headings(content)
+        
         # Verificar secciones obligatorias
-        required_sections = self.standards['document_standards']['required_sections']
+        if hits is None:
+            hits = self.matcher.scan(content)
+        found = hit_lines(hits)
+        required_sections = self.standards['document_standards'].get('required_sections', [])
         for section in required_sections:
-            if section not in content:
+            if ('required_section', section) not in found:
                 results['missing_sections'].append(section)
         
         # Verificar que tenga al menos el 70% de las secciones obligatorias
@@ -294,12 +513,11 @@ class DocumentStandardsValidator:
             results['valid'] = False
         
         # Verificar numeración de secciones
-        lines = content.split('\n')
         section_numbers = []
-        for line in lines:
-            if line.startswith('# ') and any(char.isdigit() for char in line):
+        for level, title, _ in headings:
+            if level == 1 and any(char.isdigit() for char in title):
                 # Extraer número de sección
-                number_part = line.split('.')[0].replace('#', '').strip()
+                number_part = title.split('.')[0].replace('#', '').strip()
                 if number_part.isdigit():
                     section_numbers.append(int(number_part))
         
@@ -314,25 +532,12 @@ class DocumentStandardsValidator:
     
     def generate_compliance_report(self, lang_dir: str) -> Dict:
         """Genera un reporte de cumplimiento completo"""
-        report = {
-            'language': lang_dir,
-            'timestamp': str(Path().cwd()),
-            'overall_compliance': True,
-            'metadata_validation': {},
-            'content_validation': {},
-            'recommendations': [],
-            'summary': {}
-        }
-        
         # Validar metadatos
         metadata_file = f"{lang_dir}/metadata.yaml"
         if os.path.exists(metadata_file):
-            report['metadata_validation'] = self.validate_metadata(metadata_file)
-            if not report['metadata_validation']['valid']:
-                report['overall_compliance'] = False
+            metadata_validation = self.validate_metadata(metadata_file)
         else:
-            report['overall_compliance'] = False
-            report['metadata_validation'] = {
+            metadata_validation = {
                 'valid': False,
                 'errors': ['Archivo metadata.yaml no encontrado']
             }
@@ -340,16 +545,35 @@ class DocumentStandardsValidator:
         # Validar contenido
         content_file = f"{lang_dir}/content.md"
         if os.path.exists(content_file):
-            report['content_validation'] = self.validate_content_structure(content_file)
-            if not report['content_validation']['valid']:
-                report['overall_compliance'] = False
+            content_validation = self.validate_content_structure(content_file)
         else:
-            report['overall_compliance'] = False
-            report['content_validation'] = {
+            content_validation = {
                 'valid': False,
                 'errors': ['Archivo content.md no encontrado']
             }
         
+        return self.build_report(lang_dir, metadata_validation, content_validation)
+    
+    def compliance_report(self, lang_dir: str, metadata: Dict, content: str,
+                          headings: Optional[List[Tuple[int, str, int]]] = None,
+                          hits: Optional[List[PatternHit]] = None) -> Dict:
+        """Reporte de cumplimiento de un documento ya cargado y analizado"""
+        return self.build_report(lang_dir, self.check_metadata(metadata),
+                                 self.check_content_structure(content, headings, hits=hits))
+    
+    def build_report(self, lang_dir: str, metadata_validation: Dict,
+                     content_validation: Dict) -> Dict:
+        """Reúne las validaciones de metadatos y contenido en un reporte"""
+        report = {
+            'language': lang_dir,
+            'timestamp': str(Path().cwd()),
+            'overall_compliance': metadata_validation['valid'] and content_validation['valid'],
+            'metadata_validation': metadata_validation,
+            'content_validation': content_validation,
+            'recommendations': [],
+            'summary': {}
+        }
+        
         # Generar resumen
         total_issues = (
             len(report['metadata_validation'].get('missing_fields', [])) +
@@ -417,9 +641,49 @@ class DocumentStandardsValidator:
         
         print(f"\n{'='*60}\n")
 
-def main():
-    """Función principal"""
-    validator = DocumentStandardsValidator()
+def validate_parsed(language: str, metadata: Dict, content: str,
+                    headings: List[Tuple[int, str, int]], standards: Dict,
+                    matcher: Optional[MultiPatternMatcher] = None) -> Dict:
+    """Ejecuta ambos validadores sobre un documento ya cargado y analizado
+    
+    Lo usa generate_final.py --validate con el mismo modelo del que emite el
+    LaTeX, de modo que cada archivo se lee y analiza una sola vez. matcher es
+    compile_standards() de los mismos estándares si ya se compiló.
+    """
+    # Una sola búsqueda de todas las reglas, compartida por ambos validadores
+    development = DevelopmentDocumentValidator(standards=standards, matcher=matcher)
+    hits = development.matcher.scan(content)
+    metadata_errors, metadata_warnings = development.check_metadata(metadata)
+    content_errors, content_warnings = development.check_content(content, hits)
+    compliance = DocumentStandardsValidator(standards=standards, matcher=development.matcher) \
+        .compliance_report(language, metadata, content, headings, hits)
+    
+    return {
+        'language': language,
+        'valid': not metadata_errors and not content_errors and compliance['overall_compliance'],
+        'development': {
+            'metadata': {'valid': not metadata_errors,
+                         'errors': metadata_errors, 'warnings': metadata_warnings},
+            'content': {'valid': not content_errors,
+                        'errors': content_errors, 'warnings': content_warnings},
+        },
+        'compliance': compliance,
+    }
+
+def print_validation(result: Dict, standards: Dict):
+    """Imprime el resultado de validate_parsed como los dos validadores"""
+    development = DevelopmentDocumentValidator(standards=standards)
+    for subject, key, success in (("metadata", 'metadata', "Metadata validada correctamente para desarrollo"),
+                                  ("contenido", 'content', "Contenido validado correctamente")):
+        checks = result['development'][key]
+        development.log_results(subject, checks['errors'], checks['warnings'], success)
+    development.print_summary(result['language'], result['development']['metadata']['valid'],
+                              result['development']['content']['valid'])
+    DocumentStandardsValidator(standards=standards).print_report(result['compliance'])
+
+def compliance_main(standards_file: str = "document_standards.yaml") -> bool:
+    """Reporte de cumplimiento de los idiomas del directorio actual (--compliance)"""
+    validator = DocumentStandardsValidator(standards_file)
     
     # Buscar directorios de idiomas
     lang_dirs = []
@@ -430,7 +694,7 @@ def main():
     
     if not lang_dirs:
         print("❌ No se encontraron directorios de idiomas válidos")
-        return
+        return False
     
     print(f"🔍 Validando estándares para {len(lang_dirs)} idioma(s)...")
     
@@ -444,6 +708,259 @@ def main():
     
     # Resumen final
     print(f"🎯 RESULTADO FINAL: {'✅ TODOS LOS DOCUMENTOS CUMPLEN' if overall_compliance else '❌ HAY DOCUMENTOS NO CONFORMES'}")
+    return overall_compliance
+
+class StandardsError(Exception):
+    """document_standards.yaml no se puede cargar"""
+
+def load_standards_file(standards_file: str,
+                        yaml_cache_dir: Optional[str] = DEFAULT_YAML_CACHE) -> Tuple[Dict, str]:
+    """Estándares y hash SHA-256 del archivo, sin salir del proceso ante errores
+    
+    Con yaml_cache_dir el YAML analizado se guarda en disco y solo se vuelve
+    a analizar si el archivo cambia.
+    """
+    try:
+        standards, digest, _ = YamlCache(yaml_cache_dir).load_entry(Path(standards_file))
+    except (OSError, yaml.YAMLError) as e:
+        raise StandardsError(f"Error cargando estándares {standards_file}: {e}")
+    if not isinstance(standards, dict) or 'document_standards' not in standards:
+        raise StandardsError(f"{standards_file} no tiene la sección document_standards")
+    return standards, digest
+
+def find_documents(patterns: List[str]) -> List[Tuple[Path, str]]:
+    """Pares (producto, idioma) de las rutas o globs de producto"""
+    documents = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            product = Path(match)
+            if not product.is_dir() or product.resolve() in seen:
+                continue
+            seen.add(product.resolve())
+            for item in sorted(product.iterdir()):
+                if item.is_dir() and not item.name.startswith('.'):
+                    if (item / "content.md").exists() and (item / "metadata.yaml").exists():
+                        documents.append((product, item.name))
+    return documents
+
+# Estándares y buscador compilados una vez por proceso del pool
+_BATCH_STANDARDS: Dict = {}
+_BATCH_MATCHER: Optional[MultiPatternMatcher] = None
+
+def _init_batch_worker(standards: Dict):
+    global _BATCH_STANDARDS, _BATCH_MATCHER
+    _BATCH_STANDARDS = standards
+    _BATCH_MATCHER = compile_standards(standards['document_standards'])
+
+def _validate_batch_document(language: str, metadata_text: str, content_text: str) -> Dict:
+    """Trabajo del pool: valida un documento ya leído"""
+    try:
+        metadata = safe_load(metadata_text) or {}
+    except yaml.YAMLError as e:
+        return {'language': language, 'valid': False, 'error': f"Error al cargar metadata: {e}"}
+    try:
+        return validate_parsed(language, metadata, content_text, markdown_headings(content_text),
+                               _BATCH_STANDARDS, _BATCH_MATCHER)
+    except Exception as e:
+        return {'language': language, 'valid': False, 'error': str(e)}
+
+def load_batch_cache(cache_file: str) -> Dict[str, Dict]:
+    """Entradas {clave: {'result', 'used'}} de la caché de --batch ({} si no vale)"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Cachés de otra versión (o corruptas) se descartan
+    if not isinstance(data, dict) or data.get('version') != BATCH_CACHE_VERSION:
+        return {}
+    entries = data.get('entries')
+    return entries if isinstance(entries, dict) else {}
+
+def write_batch_cache(cache_file: str, entries: Dict[str, Dict],
+                      max_entries: int = MAX_BATCH_CACHE_ENTRIES):
+    """Añade entries a la caché de --batch y la reescribe de forma atómica
+    
+    La caché en disco se vuelve a leer justo antes de escribir, de modo que se
+    conservan los resultados de otros productos (y de otras ejecuciones). Por
+    encima de max_entries se descartan las entradas usadas hace más tiempo.
+    """
+    cache = load_batch_cache(cache_file)
+    cache.update(entries)
+    if len(cache) > max_entries:
+        recent = sorted(cache.items(), key=lambda item: item[1].get('used', 0))[-max_entries:]
+        cache = dict(recent)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': BATCH_CACHE_VERSION, 'entries': cache}, f, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+
+def validator_code_hash() -> str:
+    """SHA-256 del código que valida: este módulo y yaml_cache.py
+    
+    Entra en la clave de la caché de --batch, como la entrada <generator> de
+    generate_final.py: cambiar una regla invalida los resultados guardados.
+    """
+    digest = hashlib.sha256()
+    for module_file in (__file__, yaml_cache.__file__):
+        with open(module_file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def validate_batch(documents: List[Tuple[Path, str]], standards_file: str = 'document_standards.yaml',
+                   jobs: int = 0, cache_file: Optional[str] = DEFAULT_BATCH_CACHE,
+                   yaml_cache_dir: Optional[str] = DEFAULT_YAML_CACHE) -> Dict:
+    """Valida muchos pares (producto, idioma) en un pool de procesos
+    
+    Los estándares se cargan y compilan una vez. Cada resultado se guarda en
+    cache_file con clave SHA-256 de (código del validador, estándares, idioma,
+    metadata, contenido): los documentos sin cambios no se vuelven a validar.
+    """
+    start = time.perf_counter()
+    standards, standards_hash = load_standards_file(standards_file, yaml_cache_dir)
+    code_hash = validator_code_hash()
+    
+    cache = load_batch_cache(cache_file) if cache_file else {}
+    
+    entries = []
+    pending = []
+    for product, language in documents:
+        entry = {'product': str(product), 'language': language, 'cached': False}
+        entries.append(entry)
+        try:
+            metadata_text = (product / language / "metadata.yaml").read_text(encoding='utf-8')
+            content_text = (product / language / "content.md").read_text(encoding='utf-8')
+        except OSError as e:
+            entry['result'] = {'language': language, 'valid': False, 'error': str(e)}
+            continue
+        key = hashlib.sha256('\0'.join((code_hash, standards_hash, language, metadata_text,
+                                         content_text)).encode('utf-8')).hexdigest()
+        entry['key'] = key
+        cached = cache.get(key)
+        if isinstance(cached, dict) and 'result' in cached:
+            entry['result'] = cached['result']
+            entry['cached'] = True
+        else:
+            pending.append((entry, metadata_text, content_text))
+    
+    if pending:
+        workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+        workers = max(1, min(workers, len(pending)))
+        if workers == 1:
+            _init_batch_worker(standards)
+            results = [_validate_batch_document(entry['language'], metadata_text, content_text)
+                       for entry, metadata_text, content_text in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                     initargs=(standards,)) as executor:
+                results = list(executor.map(
+                    _validate_batch_document,
+                    *zip(*((entry['language'], metadata_text, content_text)
+                           for entry, metadata_text, content_text in pending)),
+                    chunksize=max(1, len(pending) // (workers * 4))))
+        for (entry, _, _), result in zip(pending, results):
+            entry['result'] = result
+    
+    # Los resultados de esta validación se añaden a la caché (los que fallaron
+    # al leerse no tienen clave)
+    if cache_file:
+        used = time.time()
+        write_batch_cache(cache_file, {entry['key']: {'result': entry['result'], 'used': used}
+                                       for entry in entries if 'key' in entry})
+    
+    for entry in entries:
+        entry.pop('key', None)
+        entry['valid'] = entry['result']['valid']
+    failed = sum(1 for entry in entries if not entry['valid'])
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'standards': str(standards_file),
+        'standards_hash': standards_hash,
+        'valid': failed == 0,
+        'totals': {
+            'documents': len(entries),
+            'failed': failed,
+            'cached': sum(1 for entry in entries if entry['cached']),
+            'seconds': round(time.perf_counter() - start, 3),
+        },
+        'documents': entries,
+    }
+
+def document_problems(result: Dict) -> Tuple[List[str], List[str]]:
+    """(problemas, advertencias) de un resultado de validate_parsed"""
+    if 'error' in result:
+        return [result['error']], []
+    development = result['development']
+    compliance = result['compliance']
+    problems = development['metadata']['errors'] + development['content']['errors']
+    warnings = development['metadata']['warnings'] + development['content']['warnings']
+    metadata = compliance['metadata_validation']
+    content = compliance['content_validation']
+    problems += [f"Campo requerido faltante: {field}" for field in metadata.get('missing_fields', [])]
+    problems += metadata.get('errors', [])
+    problems += [f"Sección obligatoria faltante: {section}"
+                 for section in content.get('missing_sections', [])]
+    problems += content.get('structure_issues', [])
+    warnings += metadata.get('recommendations', []) + content.get('recommendations', [])
+    return problems, warnings
+
+def write_junit_report(summary: Dict, junit_file: str):
+    """Escribe el resumen de validate_batch como JUnit XML (un caso por documento)"""
+    import xml.etree.ElementTree as ET
+    
+    suite = ET.Element('testsuite', name='document-standards',
+                       tests=str(summary['totals']['documents']),
+                       failures=str(summary['totals']['failed']),
+                       time=str(summary['totals']['seconds']),
+                       timestamp=summary['generated'])
+    for entry in summary['documents']:
+        case = ET.SubElement(suite, 'testcase', classname=entry['product'], name=entry['language'])
+        problems, warnings = document_problems(entry['result'])
+        if not entry['valid']:
+            failure = ET.SubElement(case, 'failure',
+                                    message=problems[0] if problems else 'Documento no conforme')
+            failure.text = '\n'.join(problems)
+        if warnings:
+            ET.SubElement(case, 'system-out').text = '\n'.join(warnings)
+    
+    tree = ET.ElementTree(ET.Element('testsuites'))
+    tree.getroot().append(suite)
+    ET.indent(tree)
+    tree.write(junit_file, encoding='utf-8', xml_declaration=True)
+
+def batch_main(args) -> int:
+    """Modo --batch de main(); devuelve el código de salida"""
+    documents = find_documents(args.batch)
+    if not documents:
+        print("❌ No se encontraron directorios de idiomas válidos")
+        return 1
+    
+    print(f"🔍 Validando {len(documents)} documento(s)...")
+    try:
+        summary = validate_batch(documents, args.standards, jobs=args.jobs, cache_file=args.cache,
+                                 yaml_cache_dir=args.yaml_cache or None)
+    except StandardsError as e:
+        logger.error(str(e))
+        return 2
+    
+    for entry in summary['documents']:
+        if not entry['valid']:
+            problems, _ = document_problems(entry['result'])
+            print(f"❌ {entry['product']}:{entry['language']}")
+            for problem in problems:
+                print(f"   - {problem}")
+    
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    if args.junit:
+        write_junit_report(summary, args.junit)
+    
+    totals = summary['totals']
+    print(f"🎯 {totals['documents'] - totals['failed']}/{totals['documents']} documento(s) conformes "
+          f"({totals['cached']} desde caché, {totals['seconds']:.2f}s) - {args.json}")
+    return 0 if summary['valid'] else 1
 
 if __name__ == "__main__":
     main()
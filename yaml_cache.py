@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Carga de YAML compartida por el generador y los validadores
+Usa libyaml (CSafeLoader) si PyYAML se compiló con ella y guarda los
+resultados ya analizados en memoria y, opcionalmente, en disco
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Cambia si cambia el formato de las entradas guardadas en disco
+CACHE_VERSION = 1
+
+def safe_load(stream) -> Any:
+    """yaml.safe_load con CSafeLoader cuando está disponible
+    
+    PyYAML se importa al analizar: con la caché al día no se carga.
+    """
+    import yaml
+    # Sin libyaml PyYAML no define CSafeLoader: cargador en Python puro
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(stream, Loader=loader)
+
+class YamlCache:
+    """Caché de archivos YAML ya analizados
+    
+    Una entrada vale mientras el archivo conserve tamaño y mtime; si solo
+    cambió el mtime (checkout, touch) se compara el SHA-256 del contenido
+    antes de volver a analizarlo. Con directory las entradas se guardan
+    además como pickle, de modo que otros procesos (pool, ejecuciones
+    siguientes) tampoco analizan el YAML. Cada llamada devuelve una copia
+    nueva de los datos.
+    """
+    
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory) if directory else None
+        # ruta -> (tamaño, mtime_ns, sha256, datos en pickle)
+        self._memory: Dict[str, Tuple[int, int, str, bytes]] = {}
+    
+    def entry_file(self, key: str) -> Path:
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+        return self.directory / f"{name}.pickle"
+    
+    def load(self, path: Path) -> Any:
+        """Datos del YAML en path"""
+        return self.load_entry(path)[0]
+    
+    def load_entry(self, path: Path) -> Tuple[Any, str, bool]:
+        """(datos, SHA-256 del archivo, acierto de caché) del YAML en path"""
+        path = Path(path)
+        stat = path.stat()
+        key = str(path.resolve())
+        
+        cached = self._memory.get(key)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return pickle.loads(cached[3]), cached[2], True
+        
+        entry = self._read_entry(key)
+        if entry is not None and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            digest, blob, hit = entry['sha256'], entry['data'], True
+        else:
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if entry is not None and entry['sha256'] == digest:
+                blob, hit = entry['data'], True
+            else:
+                blob, hit = pickle.dumps(safe_load(data), protocol=pickle.HIGHEST_PROTOCOL), False
+            self._write_entry(key, {'version': CACHE_VERSION, 'size': stat.st_size,
+                                    'mtime_ns': stat.st_mtime_ns, 'sha256': digest, 'data': blob})
+        
+        self._memory[key] = (stat.st_size, stat.st_mtime_ns, digest, blob)
+        return pickle.loads(blob), digest, hit
+    
+    def _read_entry(self, key: str) -> Optional[Dict]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self.entry_file(key), 'rb') as f:
+                entry = pickle.load(f)
+        except Exception:
+            # Entrada inexistente, de otra versión o corrupta: se vuelve a analizar
+            return None
+        if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION:
+            return None
+        return entry
+    
+    def _write_entry(self, key: str, entry: Dict):
+        if self.directory is None:
+            return
+        entry_file = self.entry_file(key)
+        tmp_file = entry_file.with_name(f".{entry_file.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, entry_file)
+        except OSError:
+            # La caché no es crítica
+            tmp_file.unlink(missing_ok=True)